@@ -0,0 +1,84 @@
+"""Correctness and speed check for the grid-indexed location lookup.
+
+    python benchmarks/bench_geo.py                  # 50,000 random points
+    python benchmarks/bench_geo.py --points 200000 --seed 7
+
+No boundary data ships with the package, so this runs against
+benchmarks/data/synthetic_boundaries.geojson. The file has three regions
+with wavy 96-point borders: Kerala, with a hole; a Tamil Nadu
+MultiPolygon, one part of which is an enclave inside that hole; and Goa,
+named by a plain `name` property. Every point is resolved by
+LocationResolver and by a brute-force scan over all polygons, and any
+disagreement fails the run.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from disaster_chatbot.geo import LocationResolver, Location, _contains, read_boundaries  # noqa: E402
+
+BOUNDARIES = os.path.join(ROOT, 'benchmarks', 'data', 'synthetic_boundaries.geojson')
+
+# (lat, lon) -> expected place, chosen to hit each special case.
+LANDMARKS = [
+    ((10.0, 76.0), Location('tamil nadu', 'chennai')),   # the enclave
+    ((10.25, 76.0), None),                               # the hole, outside the enclave
+    ((10.0, 77.0), Location('kerala', None)),            # Kerala proper
+    ((12.0, 80.0), Location('tamil nadu', 'chennai')),   # Tamil Nadu's main part
+    ((15.0, 74.0), Location('goa', None)),
+    ((0.0, 0.0), None),                                  # far outside every cell
+]
+
+
+def brute_force(regions, lat, lon):
+    for location, polygons in regions:
+        for rings in polygons:
+            if _contains(rings, lon, lat):
+                return location
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    regions = list(read_boundaries(BOUNDARIES))
+    started = time.perf_counter()
+    resolver = LocationResolver(regions)
+    built = time.perf_counter() - started
+
+    failures = 0
+    for (lat, lon), expected in LANDMARKS:
+        found = resolver.locate(lat, lon)
+        if found != expected:
+            failures += 1
+            print(f"landmark ({lat}, {lon}): expected {expected}, got {found}")
+
+    rng = random.Random(args.seed)
+    points = [(rng.uniform(6.0, 18.0), rng.uniform(72.0, 83.0)) for _ in range(args.points)]
+    started = time.perf_counter()
+    found = resolver.locate_many(points)
+    elapsed = time.perf_counter() - started
+    mismatches = 0
+    for (lat, lon), place in zip(points, found):
+        if place != brute_force(regions, lat, lon):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"({lat}, {lon}): grid says {place}, brute force {brute_force(regions, lat, lon)}")
+    failures += mismatches
+
+    print(f"{len(resolver)} polygons indexed in {built * 1e3:.1f} ms")
+    print(f"{args.points} points: {mismatches} mismatches against brute force, "
+          f"{elapsed / args.points * 1e6:.2f} us per lookup")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Latency and throughput benchmarks for the message pipeline.
+
+    python benchmarks/bench_pipeline.py                 # run and save results
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<commit>.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from disaster_chatbot import DisasterResponseEngine, load_knowledge_base  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+QUICK_ACTIONS = [
+    'help emergency', 'help earthquake', 'help flood', 'help fire', 'help cyclone',
+    'help tsunami', 'help landslide', 'state inquiry',
+]
+
+FILLER = [
+    'please', 'we are', 'my family is', 'near the river', 'since last night', 'the road is blocked',
+    'no electricity', 'what should we do', 'kids and elderly', 'our village', 'phone battery low',
+    'i think', 'someone told me', 'the water level', 'outside our house', 'is it safe to',
+]
+
+MISSPELLINGS = [
+    'maharastra', 'kerela', 'orissa', 'gujrat', 'karnatka', 'telengana', 'chattisgarh',
+    'earthqake', 'erthquake', 'flod', 'floood', 'cyclon', 'tsunammi', 'landslid', 'fyre',
+]
+
+HINGLISH = [
+    'madad karo', 'baadh aa gayi hai', 'bhukamp aaya', 'aag lag gayi', 'pani bhar gaya',
+    'toofan aa raha hai', 'hum phas gaye hain', 'jaldi help chahiye', 'ghar gir gaya',
+    'बाढ़ आ गई है', 'भूकंप', 'आग लगी है', 'मदद चाहिए', 'केरल में', 'बिहार',
+]
+
+
+def _states(engine):
+    return list(engine.state_helplines)
+
+
+def _disasters(engine):
+    return list(engine.disaster_instructions)
+
+
+def quick_corpus(engine, rng, size):
+    names = QUICK_ACTIONS + [f'help {state}' for state in _states(engine)]
+    return [rng.choice(names) for _ in range(size)]
+
+
+def long_corpus(engine, rng, size):
+    states, disasters = _states(engine), _disasters(engine)
+    corpus = []
+    for _ in range(size):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(15, 40))]
+        if rng.random() < 0.7:
+            words.insert(rng.randrange(len(words)), 'in ' + rng.choice(states))
+        if rng.random() < 0.7:
+            words.insert(rng.randrange(len(words)), 'there is a ' + rng.choice(disasters))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def misspelled_corpus(engine, rng, size):
+    return [f'{rng.choice(FILLER)} {rng.choice(MISSPELLINGS)} {rng.choice(FILLER)}'
+            for _ in range(size)]
+
+
+def mixed_corpus(engine, rng, size):
+    states = _states(engine)
+    corpus = []
+    for _ in range(size):
+        parts = [rng.choice(HINGLISH), rng.choice(FILLER)]
+        if rng.random() < 0.5:
+            parts.append(rng.choice(states))
+        rng.shuffle(parts)
+        corpus.append(' '.join(parts))
+    return corpus
+
+
+CORPORA = {
+    'quick_actions': quick_corpus,
+    'long_messages': long_corpus,
+    'misspellings': misspelled_corpus,
+    'mixed_hindi_english': mixed_corpus,
+}
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(function, corpus, alloc_sample=200):
+    for message in corpus[:50]:
+        function(message)
+
+    timings = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for message in corpus:
+        begin = clock()
+        function(message)
+        timings.append(clock() - begin)
+    elapsed = clock() - started
+    timings.sort()
+
+    # Peak bytes allocated while handling one message, measured separately
+    # because tracing would distort the timings above.
+    tracemalloc.start()
+    allocated = 0
+    sample = corpus[:alloc_sample]
+    for message in sample:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function(message)
+        allocated += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {
+        'messages': len(corpus),
+        'throughput_per_s': round(len(corpus) / (elapsed / 1e9), 1),
+        'p50_us': round(_percentile(timings, 0.50) / 1000, 2),
+        'p99_us': round(_percentile(timings, 0.99) / 1000, 2),
+        'max_us': round(timings[-1] / 1000, 2),
+        'alloc_bytes_per_msg': round(allocated / len(sample), 1),
+    }
+
+
+def run(size, seed):
+    knowledge_base = load_knowledge_base()
+    # The cold engine has its response cache disabled so every call pays for
+    # detection; the warm engine measures the cached steady state.
+    cold = DisasterResponseEngine(knowledge_base, cache_size=0)
+    warm = DisasterResponseEngine(knowledge_base)
+    targets = {
+        'process_message': cold.process_message,
+        'process_message_cached': warm.process_message,
+        'detect_state_helpline': cold.detect_state_helpline,
+        'detect_disaster_type': cold.detect_disaster_type,
+    }
+    results = {}
+    for corpus_name, build in CORPORA.items():
+        corpus = build(cold, random.Random(seed), size)
+        for target_name, function in targets.items():
+            results[f'{target_name}/{corpus_name}'] = measure(function, corpus)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_table(results, baseline=None):
+    header = f"{'benchmark':<46}{'msg/s':>12}{'p50 us':>10}{'p99 us':>10}{'alloc B':>10}"
+    if baseline:
+        header += f"{'p99 delta':>11}"
+    print(header)
+    for name, row in results.items():
+        line = (f"{name:<46}{row['throughput_per_s']:>12,.0f}{row['p50_us']:>10.2f}"
+                f"{row['p99_us']:>10.2f}{row['alloc_bytes_per_msg']:>10.0f}")
+        if baseline and name in baseline:
+            before = baseline[name]['p99_us']
+            line += f"{(row['p99_us'] - before) / before:>+11.1%}" if before else f"{'':>11}"
+        print(line)
+
+
+def regressions(results, baseline, threshold, noise_us):
+    # A regression must clear both the relative threshold and an absolute
+    # noise floor; microsecond-scale p99s jitter by more than 25% run to run.
+    failed = []
+    for name, row in results.items():
+        before = baseline.get(name)
+        if not before or not before['p99_us']:
+            continue
+        delta = row['p99_us'] - before['p99_us']
+        if delta > noise_us and delta / before['p99_us'] > threshold:
+            failed.append(name)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=5000, help="messages per corpus")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help="fail when a p99 grows by more than this fraction of the baseline")
+    parser.add_argument('--noise-us', type=float, default=5.0,
+                        help="ignore p99 increases smaller than this many microseconds")
+    args = parser.parse_args(argv)
+
+    commit = _git_commit()
+    results = run(args.size, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'size': args.size,
+            'seed': args.seed,
+            'results': results,
+        }, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if baseline:
+        failed = regressions(results, baseline, args.max_regression, args.noise_us)
+        if failed:
+            print(f"p99 regressed by more than {args.max_regression:.0%}: {', '.join(failed)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
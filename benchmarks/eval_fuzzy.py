@@ -0,0 +1,112 @@
+"""False-correction check for the typo-tolerant lookup.
+
+    python benchmarks/eval_fuzzy.py
+    python benchmarks/eval_fuzzy.py --verbose      # list every message
+
+The fuzzy tier must not correct ordinary English and Hinglish words, many
+of them one edit from a state or disaster name, nor anything in the
+sentences reported against it. Real misspellings must still be read as the
+right state or disaster. Any miss in either direction fails the run.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from disaster_chatbot import DisasterResponseEngine  # noqa: E402
+from disaster_chatbot.normalize import normalize  # noqa: E402
+
+# Frequent words, with the near misses among them grouped by the term they
+# sit next to.
+COMMON_WORDS = [
+    # drought, burning, shaking
+    'brought', 'wrought', 'draught', 'thought', 'turning', 'burying', 'sharing',
+    'shaving', 'shaping', 'shaming', 'shading', 'soaking', 'staking', 'snaking',
+    # flooding, water, blaze, quake, tremor
+    'flooring', 'blooming', 'waiter', 'walter', 'watery', 'blazer', 'quaker', 'trevor',
+    # state names
+    'damian', 'delphi', 'bengali', 'punjabi', 'keeling', 'oriole', 'bharat',
+    # Hinglish
+    'andhera', 'andhere', 'andheri', 'bhaiya', 'bilkul', 'zaroorat', 'pareshan', 'chahiye',
+    'milega', 'rahega', 'karenge', 'jayega', 'bachche', 'parivar', 'sarkar', 'aspatal',
+    'bataiye', 'samajh', 'mohalla', 'darwaza', 'hamesha', 'musibat', 'mushkil', 'jankari',
+    'suraksha', 'mausam', 'baarish', 'kambal', 'khaana', 'rupaye', 'raasta',
+    # Everyday words.
+    'around', 'before', 'people', 'should', 'little', 'family', 'father', 'mother',
+    'school', 'street', 'number', 'police', 'doctor', 'hospital', 'morning', 'evening',
+    'tonight', 'tomorrow', 'yesterday', 'village', 'station', 'children', 'building',
+    'kitchen', 'weather', 'warning', 'working', 'waiting', 'walking', 'talking', 'sending',
+    'location', 'everyone', 'something', 'nothing', 'problem', 'message', 'network',
+    'battery', 'charging', 'shelter', 'blanket', 'medicine', 'vehicle', 'parking',
+    'driving', 'cooking', 'washing', 'sleeping', 'missing', 'looking', 'calling',
+    'thanks', 'please', 'hello', 'friends', 'brother', 'sister', 'neighbour',
+    'office', 'bridge', 'river', 'market', 'flower', 'finally', 'really', 'nicely',
+]
+
+# Sentences that were answered with disaster or state replies.
+SENTENCES = [
+    'I brought food for everyone',
+    'turning left at the school',
+    'sharing location',
+    'shaving kit needed',
+    'shaping up nicely',
+    'new flooring in the house',
+    'andhera ho gaya hai',
+    'the waiter is here',
+]
+
+# Misspelling -> (state, disaster) it must be read as.
+TYPOS = {
+    'maharastra': ('maharashtra', None),
+    'kerela': ('kerala', None),
+    'gujrat': ('gujarat', None),
+    'karnatka': ('karnataka', None),
+    'telengana': ('telangana', None),
+    'chattisgarh': ('chhattisgarh', None),
+    'rajastan': ('rajasthan', None),
+    'uttarakand': ('uttarakhand', None),
+    'meghalya': ('meghalaya', None),
+    'west bangal': ('west bengal', None),
+    'earthqake': (None, 'earthquake'),
+    'erthquake': (None, 'earthquake'),
+    'floood': (None, 'flood'),
+    'floods': (None, 'flood'),
+    'cyclon': (None, 'cyclone'),
+    'tsunammi': (None, 'tsunami'),
+    'landslid': (None, 'landslide'),
+    'hurricaine': (None, 'cyclone'),
+    'tremors': (None, 'earthquake'),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    engine = DisasterResponseEngine()
+    failures = 0
+    for message in COMMON_WORDS + SENTENCES:
+        corrected = [(hit.kind, hit.value) for hit in engine.fuzzy.scan(normalize(message))]
+        if corrected:
+            failures += 1
+            print(f"{'FALSE':<8}{message:<32}{corrected}")
+        elif args.verbose:
+            print(f"{'ok':<8}{message}")
+    for message, expected in TYPOS.items():
+        detection = engine.detect(message)
+        found = (detection.state, detection.disaster)
+        if found != expected:
+            failures += 1
+            print(f"{'MISSED':<8}{message:<32}{found}, expected {expected}")
+        elif args.verbose:
+            print(f"{'ok':<8}{message:<32}{found}")
+    print(f"\n{len(COMMON_WORDS)} common words, {len(SENTENCES)} sentences, "
+          f"{len(TYPOS)} misspellings: {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
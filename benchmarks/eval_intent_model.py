@@ -0,0 +1,202 @@
+"""Tuning and held-out check for the intent model fallback.
+
+    python benchmarks/eval_intent_model.py                          # defaults
+    python benchmarks/eval_intent_model.py --threshold 0.06 --margin 0.02
+    python benchmarks/eval_intent_model.py --tune                   # pick bounds
+
+Only phrasings the rules miss reach the model, and none of them appear in
+the knowledge base it is trained on. Each has the reply it should get, or
+None when the default reply is the right answer. The default threshold and
+margin come from --tune, which sees only TUNING; HELD_OUT measures them.
+Recall is the share of messages with a specific reply that the model gets. An abstention
+is acceptable; a wrong prediction in either set fails the run.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from disaster_chatbot import DisasterResponseEngine, load_knowledge_base  # noqa: E402
+from disaster_chatbot.classifier import IntentModel, training_examples  # noqa: E402
+
+
+def disaster(name):
+    return ('disaster', None, name)
+
+
+TUNING = {
+    # The readme's examples.
+    'smoke inhalation': disaster('fire'),
+    'mud slide blocked the road': disaster('landslide'),
+    # Plausible reports in words the tables do not use.
+    'the ground is moving': disaster('earthquake'),
+    'everything is shaking': disaster('earthquake'),
+    'walls cracking': disaster('earthquake'),
+    'aftershocks again': disaster('earthquake'),
+    'smoke everywhere': disaster('fire'),
+    'smoke coming from flat': disaster('fire'),
+    'electric short circuit sparks': disaster('fire'),
+    'river overflowing': disaster('flood'),
+    'roads submerged': disaster('flood'),
+    'dam burst': disaster('flood'),
+    'very strong gale': disaster('cyclone'),
+    'big waves from the sea': disaster('tsunami'),
+    'ocean receding suddenly': disaster('tsunami'),
+    'rocks falling from hill': disaster('landslide'),
+    'the hillside collapsed onto houses': disaster('landslide'),
+    'debris and mud everywhere': disaster('landslide'),
+    'wells have dried up': disaster('drought'),
+    # Life-threatening but not one disaster: any disaster's instructions
+    # would be a guess.
+    'trapped under building': None,
+    'people stuck under rubble': None,
+    'stuck in lift': None,
+    'gas leak smell': None,
+    # Chatter and unrelated requests.
+    'good morning': None,
+    'what is your name': None,
+    'thank you': None,
+    'how are you': None,
+    'who made you': None,
+    'I cannot find my dog': None,
+    'where is the nearest hospital': None,
+    'power cut since morning': None,
+    'my grandmother is missing': None,
+    'can you send food': None,
+    'is school closed tomorrow': None,
+    'where can I sleep tonight': None,
+    'the bridge is broken': None,
+    'lost my documents': None,
+    'cattle are dying': None,
+}
+
+
+# Written after the descriptions and never used to pick the defaults.
+HELD_OUT = {
+    'the building is swaying': disaster('earthquake'),
+    'cracks appeared in the walls after the jolt': disaster('earthquake'),
+    'furniture fell over and the floor moved': disaster('earthquake'),
+    'strong jolt felt across the city': disaster('earthquake'),
+    'river has overflowed into the village': disaster('flood'),
+    'the dam broke': disaster('flood'),
+    'water level rising in our street': disaster('flood'),
+    'the nala is overflowing': disaster('flood'),
+    'streets submerged up to the waist': disaster('flood'),
+    'embankment breached near the bridge': disaster('flood'),
+    'thick smoke in the corridor': disaster('fire'),
+    'gas cylinder exploded in the kitchen': disaster('fire'),
+    'wires sparking in the meter box': disaster('fire'),
+    'kitchen is full of smoke': disaster('fire'),
+    'gusts tearing roofs off': disaster('cyclone'),
+    'gale warning for the coast': disaster('cyclone'),
+    'roofs blown away in the night': disaster('cyclone'),
+    'the sea has pulled back far from the beach': disaster('tsunami'),
+    'huge waves hitting the coast': disaster('tsunami'),
+    'hill collapsed on the road': disaster('landslide'),
+    'boulders rolling down the mountain': disaster('landslide'),
+    'mud and rocks buried the houses': disaster('landslide'),
+    'the well is completely dry': disaster('drought'),
+    'taps have run dry for weeks': disaster('drought'),
+    'fields cracked and dry': disaster('drought'),
+    'borewell dried up': disaster('drought'),
+    'someone fainted': None,
+    'road accident near the market': None,
+    'lift is not working': None,
+    'my cat is stuck on a tree': None,
+    'hi there': None,
+    'ok thanks': None,
+    'nice day today': None,
+    'I need a job': None,
+    'when is the next train': None,
+    'my phone battery is low': None,
+    'where can I get a ration card': None,
+    'electricity bill too high': None,
+    # The general list carries the ambulance number.
+    'send an ambulance': ('general', None, None),
+}
+
+
+def evaluate(engine, model, examples, verbose=True):
+    # (right, wrong, abstained, ruled) over the messages the rules miss.
+    right = wrong = abstained = ruled = 0
+    for message, expected in examples.items():
+        message_lower = message.lower()
+        if engine.route(message_lower, engine.detect(message))[0] != 'default':
+            ruled += 1
+            continue
+        predicted = model.predict(message_lower)
+        if predicted is None:
+            abstained += 1
+            verdict = 'abstain' if expected is None else 'missed'
+        elif predicted == expected:
+            right += 1
+            verdict = 'right'
+        else:
+            wrong += 1
+            verdict = 'WRONG'
+        if verbose:
+            print(f"{verdict:<8}{message:<45}{predicted}")
+    return right, wrong, abstained, ruled
+
+
+def recall(examples, engine, right):
+    # Share of the messages with a specific reply, among those the rules
+    # miss, that the model answers.
+    reports = sum(1 for message, expected in examples.items() if expected is not None and
+                  engine.route(message.lower(), engine.detect(message))[0] == 'default')
+    return right / reports if reports else 0.0
+
+
+def tune(engine, examples, knowledge_base):
+    # Highest recall with no wrong answer on the tuning set; ties go to
+    # the stricter bounds.
+    best = None
+    for threshold in [step / 100 for step in range(3, 13)]:
+        for margin in [step / 100 for step in range(0, 9)]:
+            model = IntentModel(training_examples(knowledge_base), threshold=threshold, margin=margin)
+            right, wrong, _, _ = evaluate(engine, model, examples, verbose=False)
+            if wrong:
+                continue
+            key = (right, threshold + margin)
+            if best is None or key > best[0]:
+                best = (key, threshold, margin)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threshold', type=float, default=None)
+    parser.add_argument('--margin', type=float, default=None)
+    parser.add_argument('--tune', action='store_true',
+                        help='search threshold and margin on the tuning set only')
+    args = parser.parse_args(argv)
+
+    knowledge_base = load_knowledge_base()
+    engine = DisasterResponseEngine(knowledge_base)
+    if args.tune:
+        best = tune(engine, TUNING, knowledge_base)
+        if best is None:
+            print("no setting avoids wrong answers on the tuning set")
+            return 1
+        (right, _), threshold, margin = best
+        print(f"threshold {threshold}, margin {margin}: {right} right on the tuning set")
+        return 0
+    options = {name: value for name, value in (('threshold', args.threshold), ('margin', args.margin))
+               if value is not None}
+    model = IntentModel(training_examples(knowledge_base), **options)
+
+    failed = False
+    for name, examples in (('tuning', TUNING), ('held-out', HELD_OUT)):
+        print(f"{name}:")
+        right, wrong, abstained, ruled = evaluate(engine, model, examples)
+        print(f"{name}: {right} right, {wrong} wrong, {abstained} abstained "
+              f"({ruled} answered by the rules), recall {recall(examples, engine, right):.0%}\n")
+        failed = failed or wrong > 0
+    print(f"threshold {model.threshold}, margin {model.margin}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
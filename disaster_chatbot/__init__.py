@@ -0,0 +1,26 @@
+from importlib import import_module
+
+# Exports are imported on first use, so that light entry points such as the
+# offline bundle loader do not pay for the engine and its dependencies.
+_EXPORTS = {
+    'DisasterResponseEngine': 'engine',
+    'get_engine': 'engine',
+    'reload_engine': 'engine',
+    'watch_knowledge_base': 'engine',
+    'KnowledgeBase': 'knowledge',
+    'compile_knowledge_base': 'knowledge',
+    'load_knowledge_base': 'knowledge',
+    'Bundle': 'bundle',
+    'load_bundle': 'bundle',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
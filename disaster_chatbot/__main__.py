@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import sys
+
+from . import knowledge
+
+
+def _compile(args):
+    source = args.source or knowledge.source_path()
+    target = knowledge.compile_knowledge_base(source, args.output)
+    print(f"Compiled {source} -> {target}")
+
+
+def _export(args):
+    from .bundle import export_bundle
+    target, size = export_bundle(args.source, args.output)
+    print(f"Exported {args.source or knowledge.source_path()} -> {target} ({size} bytes)")
+
+
+def _enable_model(args):
+    # Set in the environment so that batch worker processes inherit it.
+    if args.model:
+        os.environ['DISASTER_CHATBOT_MODEL'] = '1'
+
+
+def _serve(args):
+    from .server import serve
+    _enable_model(args)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    serve(args.host, args.port, max_workers=args.workers, max_pending=args.max_pending,
+          max_connections=args.max_connections, enable_metrics=args.metrics,
+          max_sessions=args.max_sessions, session_ttl=args.session_ttl,
+          session_snapshot=args.session_snapshot)
+
+
+def _classify(args):
+    from .batch import classify_stream, write_records
+    _enable_model(args)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        records = classify_stream(source, processes=args.processes, chunk_size=args.chunk_size)
+        count = write_records(records, output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"Classified {count} messages", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m disaster_chatbot',
+                                     description="India Disaster Response Chatbot tools.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = commands.add_parser('compile', help="compile the knowledge base to SQLite")
+    compile_parser.add_argument('source', nargs='?', default=None, help="knowledge base JSON file")
+    compile_parser.add_argument('-o', '--output', default=None, help="compiled SQLite file")
+    compile_parser.set_defaults(handler=_compile)
+
+    export_parser = commands.add_parser(
+        'export', help="export every reply and the matcher to a single offline bundle")
+    export_parser.add_argument('source', nargs='?', default=None, help="knowledge base JSON file")
+    export_parser.add_argument('-o', '--output', default=None,
+                               help="bundle file (default: data/knowledge_base.bundle)")
+    export_parser.set_defaults(handler=_export)
+
+    serve_parser = commands.add_parser('serve', help="serve the chatbot over HTTP and WebSocket")
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--workers', type=int, default=8, help="engine worker threads")
+    serve_parser.add_argument('--max-pending', type=int, default=1024,
+                              help="requests allowed to wait for a worker; the least urgent are shed beyond it")
+    serve_parser.add_argument('--max-connections', type=int, default=50000)
+    serve_parser.add_argument('--metrics', action='store_true',
+                              help="record per-stage metrics and expose them at /metrics")
+    serve_parser.add_argument('--model', action='store_true',
+                              help="answer messages the rules miss with the local intent model")
+    serve_parser.add_argument('--max-sessions', type=int, default=500000,
+                              help="conversations remembered at once (0 = stateless)")
+    serve_parser.add_argument('--session-ttl', type=float, default=1800.0,
+                              help="seconds of inactivity before a conversation is forgotten")
+    serve_parser.add_argument('--session-snapshot', default=None,
+                              help="file to save conversations to and restore them from across restarts")
+    serve_parser.set_defaults(handler=_serve)
+
+    classify_parser = commands.add_parser(
+        'classify', help="triage a text or JSONL message dump into structured JSONL records")
+    classify_parser.add_argument('input', nargs='?', default='-', help="input file, or - for stdin")
+    classify_parser.add_argument('-o', '--output', default='-', help="output file, or - for stdout")
+    classify_parser.add_argument('-p', '--processes', type=int, default=1,
+                                 help="worker processes (0 = one per CPU)")
+    classify_parser.add_argument('--chunk-size', type=int, default=1000)
+    classify_parser.add_argument('--model', action='store_true',
+                                 help="classify messages the rules miss with the local intent model")
+    classify_parser.set_defaults(handler=_classify)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import json
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .engine import get_engine
+
+Record = namedtuple('Record', ['id', 'message', 'intent', 'state', 'disaster', 'urgency'])
+
+# Fields tried, in order, when a JSONL line carries the message text.
+MESSAGE_FIELDS = ('message', 'text', 'body')
+ID_FIELDS = ('id', 'request_id', 'message_id')
+
+
+def read_messages(stream):
+    # Yields (id, message) pairs from a text stream, one line at a time.
+    # Lines starting with '{' are parsed as JSON objects; anything else is
+    # taken as the message itself, numbered by line.
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = None
+            if isinstance(item, dict):
+                message = next((item[field] for field in MESSAGE_FIELDS if field in item), None)
+                if not isinstance(message, str):
+                    continue
+                record_id = next((item[field] for field in ID_FIELDS if field in item), line_number)
+                yield record_id, message
+                continue
+        yield line_number, line
+
+
+def _as_pairs(messages):
+    for index, item in enumerate(messages, 1):
+        if isinstance(item, str):
+            yield index, item
+        else:
+            yield item
+
+
+def classify_messages(messages, engine=None):
+    # Lazily classifies an iterable of messages or (id, message) pairs;
+    # memory use does not depend on how many messages there are.
+    engine = engine or get_engine()
+    classify = engine.classify
+    for record_id, message in _as_pairs(messages):
+        intent, state, disaster, urgency = classify(message)
+        yield Record(record_id, message, intent, state, disaster, urgency)
+
+
+def _classify_chunk(chunk):
+    # Runs in a worker process, which builds its own engine on first use
+    # from the shared, memory-mapped knowledge base.
+    return list(classify_messages(chunk))
+
+
+def _chunks(pairs, size):
+    while True:
+        chunk = list(islice(pairs, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def classify_parallel(messages, processes=None, chunk_size=1000, max_chunks_in_flight=None):
+    # Fans chunks out to a process pool and yields records in input order.
+    # Only a bounded window of chunks is submitted ahead of the consumer,
+    # so memory stays constant however long the input is.
+    processes = processes or os.cpu_count() or 1
+    max_chunks_in_flight = max_chunks_in_flight or processes * 2
+    pairs = _as_pairs(messages)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_flight = deque()
+        for chunk in _chunks(pairs, chunk_size):
+            in_flight.append(executor.submit(_classify_chunk, chunk))
+            if len(in_flight) >= max_chunks_in_flight:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def classify_stream(stream, processes=1, chunk_size=1000):
+    messages = read_messages(stream)
+    if processes == 1:
+        return classify_messages(messages)
+    return classify_parallel(messages, processes=processes, chunk_size=chunk_size)
+
+
+def write_records(records, output):
+    count = 0
+    for record in records:
+        output.write(json.dumps(record._asdict(), ensure_ascii=False))
+        output.write('\n')
+        count += 1
+    return count
@@ -0,0 +1,197 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+
+from . import routing
+from .matcher import PhraseMatcher
+from .normalize import normalize
+
+# Single-file export of every reply the engine can give plus its matcher,
+# for devices that cannot afford to build the engine. Deliberately imports
+# neither the engine nor SQLite.
+#
+# Layout, little-endian:
+#   header     magic, format version, knowledge base version, CRC-32 of
+#              everything after the header, then (offset, length) of the
+#              dictionary and the index, and (offset, count) of the blocks
+#   dictionary zlib preset dictionary shared by every block
+#   index      zlib-compressed JSON: reply keys in block order, state and
+#              disaster ranks, and the exported PhraseMatcher
+#   offsets    count + 1 uint32 file offsets; block i spans [i, i + 1)
+#   blocks     one zlib stream per reply
+# A reply costs one offsets read and one small decompression straight out
+# of the mapped file, so only the replies actually asked for are paged in.
+
+MAGIC = b'DCBUNDLE'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHHIIIIIIII')
+OFFSET_PAIR = struct.Struct('<II')
+# zlib only looks back 32 KiB, so a longer dictionary would be wasted.
+MAX_DICTIONARY_BYTES = 32 * 1024
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'knowledge_base.bundle')
+
+
+def bundle_path():
+    return os.environ.get('DISASTER_CHATBOT_BUNDLE') or DEFAULT_PATH
+
+
+def _reply_keys(engine, composite_intents):
+    # Every key routing.route() can produce: the fixed replies, then each
+    # state and disaster combination the composite intents can ask for.
+    keys = list(engine.responses)
+    seen = set(keys)
+    for state in (None, *engine.state_helplines):
+        for disaster in (None, *engine.disaster_instructions):
+            for intent in composite_intents:
+                if intent == 'state' and state is None or intent == 'disaster' and state is not None:
+                    continue
+                key = (intent, state, disaster)
+                if key not in seen and (state or disaster):
+                    seen.add(key)
+                    keys.append(key)
+    return keys
+
+
+def _dictionary(engine):
+    # The fragments every reply is assembled from, most widely shared last
+    # because zlib reaches nearer matches with shorter codes.
+    fragments = engine.fragments
+    shared = [fragments[name] for name in ('emergency', 'agencies', 'disaster_hint', 'contacts', 'footer')]
+    specific = [fragment for key, fragment in fragments.items() if isinstance(key, tuple)]
+    return '\n\n'.join(specific + shared).encode('utf-8')[-MAX_DICTIONARY_BYTES:]
+
+
+def write_bundle(engine, path):
+    # Only the exporting side needs these; devices just load.
+    import tempfile
+    from .engine import COMPOSITE_INTENTS
+    keys = _reply_keys(engine, COMPOSITE_INTENTS)
+    dictionary = _dictionary(engine)
+    blocks = []
+    for key in keys:
+        compressor = zlib.compressobj(9, zdict=dictionary)
+        blocks.append(compressor.compress(engine.get_response(*key).encode('utf-8')) + compressor.flush())
+    index = zlib.compress(json.dumps({
+        'keys': keys,
+        'states': list(engine.state_helplines),
+        'disasters': list(engine.disaster_keywords),
+        'matcher': engine.matcher.export(),
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+    dictionary_offset = HEADER.size
+    index_offset = dictionary_offset + len(dictionary)
+    offsets_offset = index_offset + len(index)
+    position = offsets_offset + 4 * (len(blocks) + 1)
+    offsets = [position]
+    for block in blocks:
+        position += len(block)
+        offsets.append(position)
+    body = b''.join([dictionary, index, struct.pack(f'<{len(offsets)}I', *offsets)] + blocks)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, engine.version, zlib.crc32(body),
+                         dictionary_offset, len(dictionary), index_offset, len(index),
+                         offsets_offset, len(blocks))
+
+    # Written next to the target and renamed into place, like the compiled
+    # knowledge base, so a device never loads half a bundle.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.bundle-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        # mkstemp creates the file private; the bundle is meant to be copied around.
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return len(header) + len(body)
+
+
+def export_bundle(source=None, target=None):
+    # Builds an engine from the knowledge base (without the optional model
+    # tier, whose answers cannot be precomputed) and writes its bundle.
+    from .engine import DisasterResponseEngine
+    from .knowledge import load_knowledge_base
+    target = target or bundle_path()
+    size = write_bundle(DisasterResponseEngine(load_knowledge_base(source)), target)
+    return target, size
+
+
+class Bundle:
+    # Answers messages from a bundle written by write_bundle(). Loading maps
+    # the file and parses the small index; no table, trie or closure is
+    # rebuilt. Typo correction and the model tier are not included, so a
+    # misspelt state falls through to the same reply as an unknown one.
+
+    def __init__(self, path=None, verify=True):
+        self.path = path or bundle_path()
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load(verify)
+        except BaseException:
+            self._map.close()
+            raise
+
+    def _load(self, verify):
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.path}: not a chatbot bundle")
+        (magic, format_version, _, self.version, checksum, dictionary_offset, dictionary_length,
+         index_offset, index_length, self._offsets, self._count) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a chatbot bundle")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported bundle format {format_version}")
+        if verify:
+            with memoryview(self._map) as view, view[HEADER.size:] as body:
+                if zlib.crc32(body) != checksum:
+                    raise ValueError(f"{self.path}: bundle is corrupt")
+        self._dictionary = self._map[dictionary_offset:dictionary_offset + dictionary_length]
+        index = json.loads(zlib.decompress(self._map[index_offset:index_offset + index_length]))
+        self._blocks = {tuple(key): number for number, key in enumerate(index['keys'])}
+        self._state_rank = {state: rank for rank, state in enumerate(index['states'])}
+        self._disaster_rank = {disaster: rank for rank, disaster in enumerate(index['disasters'])}
+        self.matcher = PhraseMatcher.from_export(index['matcher'])
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def get_response(self, intent, state=None, disaster=None):
+        number = self._blocks.get((intent, state, disaster))
+        if number is None:
+            return None
+        start, end = OFFSET_PAIR.unpack_from(self._map, self._offsets + 4 * number)
+        decompressor = zlib.decompressobj(zdict=self._dictionary)
+        return (decompressor.decompress(self._map[start:end]) + decompressor.flush()).decode('utf-8')
+
+    def detect(self, message):
+        message_lower = normalize(message)
+        hits = self.matcher.scan(message_lower)
+        intents, state, disaster, case_sensitive = routing.read_hits(
+            message, message_lower, hits, self._state_rank, self._disaster_rank)
+        return routing.Detection(frozenset(intents), state, disaster, hits, case_sensitive)
+
+    def route(self, message):
+        normalized = ' '.join(message.split())
+        return routing.route(normalized.lower(), self.detect(normalized))
+
+    def process_message(self, message):
+        return self.get_response(*self.route(message))
+
+
+def load_bundle(path=None, verify=True):
+    return Bundle(path, verify)
@@ -0,0 +1,165 @@
+import math
+import re
+from collections import Counter
+
+from .cache import LRUCache
+
+WORD_PATTERN = re.compile(r'[^\W\d_]{2,}')
+NGRAM_SIZE = 5
+
+# Short words the tables share across every class carry no signal.
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'do', 'for', 'from', 'if', 'in', 'into', 'is',
+    'it', 'me', 'my', 'no', 'not', 'of', 'on', 'or', 'our', 'so', 'the', 'there', 'this', 'to', 'up',
+    'us', 'we', 'what', 'with', 'you', 'your',
+))
+
+
+def features(text):
+    # Whole words plus character 5-grams of each word; the n-grams let
+    # "smoky" share weight with "smoke" and survive most typos.
+    counts = Counter()
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        counts['w:' + word] += 1
+        padded = f' {word} '
+        for start in range(len(padded) - NGRAM_SIZE + 1):
+            counts['c:' + padded[start:start + NGRAM_SIZE]] += 1
+    return counts
+
+
+def training_examples(knowledge_base):
+    # (route key, text) pairs drawn from the knowledge base itself, so the
+    # model is retrained for free whenever the tables change.
+    intent_routes = {
+        'emergency': ('emergency', None, None),
+        'national': ('national', None, None),
+        'helpline': ('general', None, None),
+    }
+    for intent, keywords in knowledge_base.intent_keywords.items():
+        key = intent_routes.get(intent)
+        if key is None:
+            continue
+        for keyword in keywords:
+            yield key, keyword
+    for service in knowledge_base.national_helplines:
+        yield ('general', None, None), service
+    for disaster, instructions in knowledge_base.disaster_instructions.items():
+        key = ('disaster', None, disaster)
+        yield key, disaster
+        for line in instructions:
+            if line.strip():
+                yield key, line
+        for keyword in knowledge_base.disaster_keywords.get(disaster, ()):
+            yield key, keyword
+        for pattern in knowledge_base.disaster_help_patterns.get(disaster, ()):
+            yield key, pattern
+        # What people report in their own words ("river overflowed"); the
+        # instructions alone rarely use them.
+        for description in knowledge_base.disaster_descriptions.get(disaster, ()):
+            yield key, description
+
+
+class IntentModel:
+    # TF-IDF features scored against one centroid per route key: a linear
+    # model with no training loop, small enough to build with the engine.
+    # Only messages the rules could not place reach it.
+
+    # Each centroid spreads over a whole table of instructions, so cosine
+    # scores are small: a real hit lands around 0.1, chatter below 0.04.
+    # Wrong safety instructions are worse than the default reply. The
+    # bounds are the best recall with no wrong answers on the tuning set of
+    # benchmarks/eval_intent_model.py (--tune); its held-out set measures
+    # them.
+    def __init__(self, examples, threshold=0.07, margin=0.02, cache_size=4096):
+        self.threshold = threshold
+        self.margin = margin
+        self.cache = LRUCache(cache_size)
+
+        documents = [(key, features(text)) for key, text in examples]
+        document_frequency = Counter()
+        for _, counts in documents:
+            document_frequency.update(counts.keys())
+        total = len(documents)
+        self._idf = {feature: math.log((1 + total) / (1 + frequency)) + 1
+                     for feature, frequency in document_frequency.items()}
+        self._unknown_idf = math.log(1 + total) + 1
+
+        self.labels = []
+        label_index = {}
+        centroids = []
+        for key, counts in documents:
+            vector = self._vector(counts)
+            if not vector:
+                continue
+            if key not in label_index:
+                label_index[key] = len(self.labels)
+                self.labels.append(key)
+                centroids.append(Counter())
+            centroids[label_index[key]].update(vector)
+
+        # Inverted layout: feature -> ((label, weight), ...), so scoring a
+        # message touches only the features it contains.
+        weights = {}
+        for label, centroid in enumerate(centroids):
+            norm = math.sqrt(sum(value * value for value in centroid.values()))
+            for feature, value in centroid.items():
+                weights.setdefault(feature, []).append((label, value / norm))
+        self._weights = {feature: tuple(pairs) for feature, pairs in weights.items()}
+
+    def _vector(self, counts):
+        idf = self._idf
+        vector = {feature: (1 + math.log(count)) * idf[feature]
+                  for feature, count in counts.items() if feature in idf}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {feature: value / norm for feature, value in vector.items()} if norm else {}
+
+    def _score(self, text):
+        counts = features(text)
+        if not counts:
+            return None
+        idf = self._idf
+        unknown_idf = self._unknown_idf
+        # Unseen words still count towards the norm, so a message that is
+        # mostly unrelated cannot score highly on one shared word.
+        weighted = {feature: (1 + math.log(count)) * idf.get(feature, unknown_idf)
+                    for feature, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in weighted.values()))
+        scores = [0.0] * len(self.labels)
+        weights = self._weights
+        for feature, value in weighted.items():
+            for label, weight in weights.get(feature, ()):
+                scores[label] += value * weight
+        best = max(range(len(scores)), key=scores.__getitem__)
+        best_score = scores[best] / norm
+        runner_up = max((score for label, score in enumerate(scores) if label != best), default=0.0) / norm
+        if best_score < self.threshold or best_score - runner_up < self.margin:
+            return None
+        return self.labels[best]
+
+    def predict(self, text):
+        # Route key such as ('disaster', None, 'fire'), or None when no
+        # class is confident enough.
+        return self.predict_many([text])[0]
+
+    def predict_many(self, texts):
+        # Same as predict() per text; repeated texts are scored once.
+        results = [None] * len(texts)
+        missing = {}
+        for index, text in enumerate(texts):
+            cached = self.cache.get(text)
+            if cached is not None:
+                results[index] = cached[0]
+            else:
+                missing.setdefault(text, []).append(index)
+        for text, indexes in missing.items():
+            key = self._score(text)
+            self.cache.put(text, (key,))
+            for index in indexes:
+                results[index] = key
+        return results
+
+
+def build_fallback(knowledge_base, **options):
+    return IntentModel(training_examples(knowledge_base), **options)
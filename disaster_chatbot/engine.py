@@ -0,0 +1,660 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from . import geo, knowledge, metrics, routing, urgency
+from .cache import LRUCache
+from .classifier import build_fallback
+from .fuzzy import FuzzyIndex
+from .matcher import PhraseMatcher
+from .normalize import normalize
+from .routing import Detection
+
+logger = logging.getLogger(__name__)
+
+Classification = namedtuple('Classification', ['intent', 'state', 'disaster', 'urgency'])
+
+# Intents whose reply can combine a state, a disaster or both.
+COMPOSITE_INTENTS = ('emergency', 'state', 'disaster')
+
+# (located state, remembered state, remembered disaster) of a message sent
+# without coordinates or a session.
+NO_CONTEXT = (None, None, None)
+
+# Intents that, without a state of their own, ask about the one remembered
+# from earlier in the session ("help" or "helpline" after "Kerala").
+FOLLOW_UP_INTENTS = frozenset(('emergency', 'help', 'helpline'))
+
+
+def _freeze(table):
+    return MappingProxyType(dict(table))
+
+
+def _freeze_lists(table):
+    return _freeze((key, tuple(values)) for key, values in table.items())
+
+
+class DisasterResponseEngine:
+    # Every table is frozen at construction, so one instance can be shared
+    # by any number of threads without locking.
+    __slots__ = ('knowledge_base', 'version', 'state_helplines', 'national_helplines', 'disaster_instructions',
+                 'state_variations', 'disaster_help_patterns', 'disaster_keywords',
+                 'intent_keywords', 'state_translations', 'disaster_translations', 'intent_translations',
+                 'urgency_terms', 'common_words', 'urgency_scorer',
+                 'state_aliases', 'matcher', 'fuzzy', 'fallback', 'locator', 'fragments',
+                 'responses', 'response_cache',
+                 '_state_rank', '_disaster_rank')
+
+    def __init__(self, knowledge_base=None, cache_size=4096, fallback=None, locator=None):
+        if knowledge_base is None:
+            knowledge_base = knowledge.load_knowledge_base()
+        self.knowledge_base = knowledge_base
+        self.version = knowledge_base.version
+        self.state_helplines = _freeze(knowledge_base.state_helplines)
+        self.national_helplines = _freeze(knowledge_base.national_helplines)
+        self.disaster_instructions = _freeze_lists(knowledge_base.disaster_instructions)
+        self.state_variations = _freeze_lists(knowledge_base.state_variations)
+        self.disaster_help_patterns = _freeze_lists(knowledge_base.disaster_help_patterns)
+        self.disaster_keywords = _freeze_lists(knowledge_base.disaster_keywords)
+        self.intent_keywords = _freeze_lists(knowledge_base.intent_keywords)
+        self.state_translations = _freeze_lists(knowledge_base.state_translations)
+        self.disaster_translations = _freeze_lists(knowledge_base.disaster_translations)
+        self.intent_translations = _freeze_lists(knowledge_base.intent_translations)
+        self.urgency_terms = _freeze_lists(knowledge_base.urgency_terms)
+        self.common_words = _freeze_lists(knowledge_base.common_words)
+        self.state_aliases = _freeze(self._build_state_aliases())
+
+        # Table order decides which state or disaster wins when a message
+        # mentions several of them.
+        self._state_rank = _freeze((state, rank) for rank, state in enumerate(self.state_helplines))
+        self._disaster_rank = _freeze(
+            (disaster, rank) for rank, disaster in enumerate(self.disaster_keywords))
+        self.matcher = PhraseMatcher(self._vocabulary())
+        self.fuzzy = FuzzyIndex(self._fuzzy_vocabulary(), [
+            normalize(word) for words in self.common_words.values() for word in words])
+        self.urgency_scorer = urgency.UrgencyScorer(self._urgency_vocabulary())
+        # Optional second tier with a predict(message) -> route key or None
+        # method, consulted only when the rules end in the default reply.
+        self.fallback = fallback
+        # Optional geo.LocationResolver for messages sent with coordinates.
+        self.locator = locator
+        self.fragments = _freeze(self._render_fragments())
+        self.responses = _freeze(self._render_responses())
+        # The only mutable member; it guards itself with its own lock.
+        self.response_cache = LRUCache(cache_size)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        object.__setattr__(self, name, value)
+
+    def _build_state_aliases(self):
+        aliases = {}
+        for state in self.state_helplines:
+            aliases[state] = state
+        for table in (self.state_variations, self.state_translations):
+            for state, variations in table.items():
+                if state not in self.state_helplines:
+                    continue
+                for alias in variations:
+                    aliases.setdefault(' '.join(normalize(alias).split()), state)
+        return aliases
+
+    def _render_fragments(self):
+        # Building blocks for replies that answer several mentions at once.
+        # The shared contact list is kept apart so that a combined reply
+        # carries it a single time.
+        fragments = {
+            'emergency': self._render_emergency_actions(),
+            'contacts': self._render_emergency_contacts(),
+            'agencies': "📞 DISASTER MANAGEMENT:\n• NDRF: 011-24363260\n• NDMA: 011-26701728",
+            'disaster_hint': "For specific disaster instructions, mention the type of disaster.",
+            'footer': "💡 Available 24/7 for disaster-related emergencies",
+        }
+        for state, helpline in self.state_helplines.items():
+            fragments[('state', state)] = self._render_state_numbers(state, helpline)
+        for disaster, instructions in self.disaster_instructions.items():
+            fragments[('disaster', disaster)] = "\n".join(instructions)
+        return {key: sys.intern(fragment) for key, fragment in fragments.items()}
+
+    def _compose(self, intent, state, disaster):
+        # Emergency actions first, then the state's numbers, then what to do
+        # about the disaster, then contacts. The emergency block already
+        # lists 100/101/102/108, so only the national agencies follow it.
+        fragments = self.fragments
+        parts = []
+        if intent == 'emergency':
+            parts.append(fragments['emergency'])
+        if state:
+            parts.append(fragments[('state', state)])
+        if disaster:
+            parts.append(fragments[('disaster', disaster)])
+        if intent == 'emergency':
+            parts.append(fragments['agencies'])
+            if not disaster:
+                parts.append(fragments['disaster_hint'])
+        else:
+            parts.append(fragments['contacts'])
+            parts.append(fragments['footer'])
+        return '\n\n'.join(parts)
+
+    def _render_responses(self):
+        # Every reply is a pure function of (intent, state, disaster), so all
+        # of them are rendered once here and shared by every request.
+        responses = {
+            ('emergency', None, None): self._render_emergency_response(),
+            ('national', None, None): self._render_national_helplines(),
+            ('general', None, None): self._render_general_helplines(),
+            ('state_inquiry', None, None): self._render_state_inquiry_response(),
+            ('default', None, None): self._render_default_response(),
+        }
+        for state, helpline in self.state_helplines.items():
+            responses[('state', state, None)] = self._render_state_helpline(state, helpline)
+        for disaster, instructions in self.disaster_instructions.items():
+            responses[('disaster', None, disaster)] = self._render_disaster_instructions(instructions)
+        return {key: sys.intern(response) for key, response in responses.items()}
+
+    def get_response(self, intent, state=None, disaster=None):
+        response = self.responses.get((intent, state, disaster))
+        if response is None and intent in COMPOSITE_INTENTS and (state or disaster):
+            try:
+                response = self._compose(intent, state, disaster)
+            except KeyError:
+                return None
+        return response
+
+    def resolve_state(self, name):
+        return self.state_aliases.get(' '.join(normalize(name).split()))
+
+    def _vocabulary(self):
+        for alias, state in self.state_aliases.items():
+            # Two-letter abbreviations such as "up" or "mp" double as
+            # ordinary words, so they only count when written in capitals.
+            kind = 'state_abbreviation' if len(alias) <= 2 and alias.isascii() else 'state'
+            yield alias, kind, state, True
+        for disaster, patterns in self.disaster_help_patterns.items():
+            for pattern in patterns:
+                yield pattern, 'disaster_help', disaster
+        for disaster, keywords in self.disaster_keywords.items():
+            for keyword in keywords:
+                yield keyword, 'disaster', disaster
+        for intent, keywords in self.intent_keywords.items():
+            for keyword in keywords:
+                yield keyword, 'intent', intent
+        # Translations are whole words only: romanized "aag" must not fire
+        # inside "aage", nor Devanagari "आग" inside "आगरा".
+        for disaster, terms in self.disaster_translations.items():
+            for term in terms:
+                yield normalize(term), 'disaster', disaster, True
+        for intent, terms in self.intent_translations.items():
+            for term in terms:
+                yield normalize(term), 'intent', intent, True
+
+    def _fuzzy_vocabulary(self):
+        # Phrases such as "help assam" or "flood help" only exist for the
+        # exact matcher; correcting them would make every "help <word>" a
+        # candidate.
+        intent_words = {word for keywords in self.intent_keywords.values()
+                        for keyword in keywords for word in keyword.split()}
+        for alias, state in self.state_aliases.items():
+            # Edit distance over Indic scripts would count vowel signs as
+            # letters; native-script names are matched exactly instead.
+            if alias.isascii() and not intent_words.intersection(alias.split()):
+                yield alias, 'state', state
+        for disaster in self.disaster_instructions:
+            yield disaster, 'disaster', disaster
+        for disaster, keywords in self.disaster_keywords.items():
+            for keyword in keywords:
+                if not intent_words.intersection(keyword.split()):
+                    yield keyword, 'disaster', disaster
+
+    def _urgency_vocabulary(self):
+        for tier, terms in self.urgency_terms.items():
+            weight = urgency.TIER_WEIGHTS.get(tier)
+            if weight is None:
+                logger.warning("Ignoring unknown urgency tier %r", tier)
+                continue
+            for term in terms:
+                yield term, weight, True
+        for keyword in self.intent_keywords.get('emergency', ()):
+            yield keyword, urgency.EMERGENCY_WEIGHT, False
+        for term in self.intent_translations.get('emergency', ()):
+            yield term, urgency.EMERGENCY_WEIGHT, True
+        for keywords in self.disaster_keywords.values():
+            for keyword in keywords:
+                yield keyword, urgency.DISASTER_WEIGHT, False
+        for terms in self.disaster_translations.values():
+            for term in terms:
+                yield term, urgency.DISASTER_WEIGHT, True
+
+    def detect(self, message):
+        message_lower = normalize(message)
+        hits = self.matcher.scan(message_lower)
+        state_rank = self._state_rank
+        disaster_rank = self._disaster_rank
+        intents, state, disaster, case_sensitive = routing.read_hits(
+            message, message_lower, hits, state_rank, disaster_rank)
+
+        # Typo-tolerant second look, only for whatever the exact pass missed.
+        if state is None or disaster is None:
+            fuzzy_state = fuzzy_disaster = None
+            fuzzy_hits = self.fuzzy.scan(message_lower)
+            for hit in fuzzy_hits:
+                if hit.kind == 'state':
+                    if fuzzy_state is None or state_rank[hit.value] < state_rank[fuzzy_state]:
+                        fuzzy_state = hit.value
+                elif fuzzy_disaster is None or disaster_rank[hit.value] < disaster_rank[fuzzy_disaster]:
+                    fuzzy_disaster = hit.value
+            if fuzzy_hits:
+                state = state or fuzzy_state
+                disaster = disaster or fuzzy_disaster
+                hits = hits + fuzzy_hits
+        return Detection(frozenset(intents), state, disaster, hits, case_sensitive)
+
+    def cached_response(self, message, location=None, session=None):
+        # The cached reply, or None; cheap enough for an event loop. Takes
+        # the same context as process_message.
+        recorder = metrics.recorder
+        started = time.perf_counter() if recorder is not None else 0.0
+        context = self._context(location, session)
+        cached = self.response_cache.peek(self._cache_key(' '.join(message.split()).lower(), context))
+        if cached is None:
+            return None
+        key, response = cached
+        if session is not None:
+            session.record(key[1], key[2])
+        if recorder is not None:
+            recorder.record_request(key[0], True, time.perf_counter() - started)
+        return response
+
+    def locate(self, lat, lon):
+        # Location(state, district) with the state in the engine's own
+        # spelling, or None without boundary data or outside every state.
+        if self.locator is None:
+            return None
+        place = self.locator.locate(lat, lon)
+        if place is None:
+            return None
+        state = self.resolve_state(place.state)
+        if state is None:
+            return None
+        return geo.Location(state, place.district)
+
+    def locate_many(self, points):
+        return [self.locate(lat, lon) for lat, lon in points]
+
+    def process_message(self, message, location=None, session=None):
+        # location is an optional (lat, lon) pair; session an optional
+        # sessions.Session that carries context between messages.
+        recorder = metrics.recorder
+        if recorder is not None or location is not None or session is not None:
+            return self._process(message, location, session, recorder)
+
+        normalized = ' '.join(message.split())
+        cache_key = normalized.lower()
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached[1]
+
+        detection = self.detect(normalized)
+        return self._answer(cache_key, self.resolve(cache_key, detection), detection)
+
+    def _process(self, message, location, session, recorder):
+        # Same steps as process_message, plus the message's context and,
+        # when a recorder is given, timing phase by phase.
+        clock = time.perf_counter
+        started = clock() if recorder is not None else 0.0
+        context = self._context(location, session)
+        normalized = ' '.join(message.split())
+        message_lower = normalized.lower()
+        cache_key = self._cache_key(message_lower, context)
+        cached = self.response_cache.get(cache_key)
+        if recorder is not None:
+            looked_up = clock()
+            recorder.observe_phase('cache_lookup', looked_up - started)
+
+        if cached is not None:
+            key, response = cached
+            if recorder is not None:
+                recorder.record_request(key[0], True, looked_up - started)
+        else:
+            detection = self._fill_in(message_lower, self.detect(normalized), context)
+            if recorder is not None:
+                detected = clock()
+                recorder.observe_phase('detect', detected - looked_up)
+            key = self.route(message_lower, detection)
+            if recorder is not None:
+                routed = clock()
+                recorder.observe_phase('route', routed - detected)
+            if key[0] == 'default' and self.fallback is not None:
+                key = self.fallback.predict(message_lower) or key
+                if recorder is not None:
+                    recorder.observe_phase('model', clock() - routed)
+            response = self._answer(cache_key, key, detection)
+            if recorder is not None:
+                recorder.record_request(key[0], False, clock() - started,
+                                        normalized if key[0] == 'default' else None)
+        if session is not None:
+            session.record(key[1], key[2])
+        return response
+
+    def _context(self, location, session):
+        if location is None and session is None:
+            return NO_CONTEXT
+        located = remembered_state = remembered_disaster = None
+        if location is not None:
+            place = self.locate(*location)
+            if place is not None:
+                located = place.state
+        if session is not None:
+            state, disaster = session.context()
+            # The knowledge base may have been reloaded since they were stored.
+            if state in self.state_helplines:
+                remembered_state = state
+            if disaster in self.disaster_instructions:
+                remembered_disaster = disaster
+        return located, remembered_state, remembered_disaster
+
+    def _cache_key(self, message_lower, context):
+        # A message without context shares its entry with plain requests.
+        return message_lower if context == NO_CONTEXT else (message_lower,) + context
+
+    def _fill_in(self, message_lower, detection, context):
+        # Fills in what the message leaves out. A state or disaster from
+        # earlier in the session completes a follow-up ("flood" or
+        # "helpline" after "Kerala", or the reverse); failing that, the
+        # state at the sender's coordinates is used. A state named in the
+        # message always wins, and "national" keeps the national reply.
+        if context == NO_CONTEXT:
+            return detection
+        located, remembered_state, remembered_disaster = context
+        state, disaster = detection.state, detection.disaster
+        intents = detection.intents
+        if state is None and 'national' not in intents and (
+                disaster or not FOLLOW_UP_INTENTS.isdisjoint(intents) or
+                message_lower in routing.STATE_INQUIRY_MESSAGES):
+            state = remembered_state
+        if disaster is None and state is not None and detection.state is not None:
+            disaster = remembered_disaster
+        state = state or located
+        if (state, disaster) != (detection.state, detection.disaster):
+            detection = detection._replace(state=state, disaster=disaster)
+        return detection
+
+    def _answer(self, cache_key, key, detection):
+        response = self.responses.get(key) or self._compose(*key)
+        # Results that hinged on capitalisation (e.g. "UP" vs "up") are not
+        # cached under the case-folded key.
+        if not detection.case_sensitive:
+            self.response_cache.put(cache_key, (key, response))
+        return response
+
+    def classify(self, message):
+        # Structured counterpart of process_message for bulk triage: the
+        # intent that would answer, plus every entity found along the way.
+        normalized = ' '.join(message.split())
+        detection = self.detect(normalized)
+        intent, _, disaster = self.resolve(normalized.lower(), detection)
+        if intent != 'default' and not detection.intents and detection.disaster is None:
+            # Placed by the model tier rather than the rules.
+            intents = frozenset(('emergency',)) if intent == 'emergency' else detection.intents
+            detection = detection._replace(intents=intents, disaster=disaster)
+        return Classification(intent, detection.state, detection.disaster,
+                              self.urgency(normalized, detection))
+
+    def urgency(self, message, detection=None):
+        # 'high', 'medium' or 'low'. The scorer only sees exact phrases, so
+        # a detection adds what the fuzzy and model tiers found.
+        score = self.urgency_scorer.score(message)
+        if detection is not None:
+            if 'emergency' in detection.intents:
+                score = max(score, urgency.HIGH_SCORE)
+            elif detection.disaster:
+                score = max(score, urgency.MEDIUM_SCORE)
+        return urgency.level_for(score)
+
+    def priority(self, message):
+        # Scheduling priority for the server: 0 (most urgent) to 2.
+        return self.urgency_scorer.priority(message)
+
+    def resolve(self, message_lower, detection):
+        # Rules first. The model tier only sees messages the rules would
+        # have sent to the default reply, so matched traffic never pays for it.
+        key = self.route(message_lower, detection)
+        if key[0] == 'default' and self.fallback is not None:
+            return self.fallback.predict(message_lower) or key
+        return key
+
+    def route(self, message_lower, detection):
+        return routing.route(message_lower, detection)
+
+    def get_state_inquiry_response(self):
+        return self.responses[('state_inquiry', None, None)]
+
+    def _render_state_inquiry_response(self):
+        response = "I'm here to help with disaster-related emergencies in India!\n\n"
+        response += "📍 **For the most relevant help, please tell me:**\n"
+        response += "• Which state you're in (e.g., 'I'm in Maharashtra')\n"
+        response += "• What type of disaster you need help with\n\n"
+        response += "**Available assistance:**\n"
+        response += "• State-specific disaster helpline numbers\n"
+        response += "• Disaster safety instructions (Earthquake, Flood, Fire, Cyclone, Tsunami, Landslide)\n"
+        response += "• Emergency contact numbers\n"
+        response += "• Disaster preparedness advice\n\n"
+        response += "**Quick examples:**\n"
+        response += "• 'I'm in Kerala and there's a flood' → Kerala helpline + flood safety\n"
+        response += "• 'help fire' → Fire safety instructions\n"
+        response += "• 'emergency' → Immediate emergency response"
+        return response
+
+    def get_emergency_response(self):
+        return self.responses[('emergency', None, None)]
+
+    def _render_emergency_response(self):
+        return self._render_emergency_actions() + "\n\nFor specific disaster instructions, mention the type of disaster."
+
+    def _render_emergency_actions(self):
+        response = "🚨 EMERGENCY RESPONSE:\n\n"
+        response += "IMMEDIATE ACTIONS:\n"
+        response += "• Call 100 for Police\n"
+        response += "• Call 101 for Fire\n"
+        response += "• Call 102 for Ambulance\n"
+        response += "• Call 108 for Disaster Management\n\n"
+        response += "STAY CALM AND FOLLOW THESE STEPS:\n"
+        response += "1. Ensure your safety first\n"
+        response += "2. Call emergency services immediately\n"
+        response += "3. Follow their instructions\n"
+        response += "4. Help others if it's safe to do so\n"
+        response += "5. Stay in a safe location"
+        return response
+
+    def detect_state_helpline(self, message):
+        state = self.detect(message).state
+        if state:
+            return self.get_state_helpline(state)
+        return None
+
+    def get_state_helpline(self, state):
+        return self.responses.get(('state', state, None))
+
+    def get_district_helpline(self, state, district):
+        # District rows are not copied into the engine; they are read on
+        # demand from the shared, memory-mapped knowledge base file.
+        return self.knowledge_base.district_helpline(state, district)
+
+    def _render_state_numbers(self, state, helpline):
+        response = f"📍 {state.title()} Disaster Helpline Numbers:\n\n"
+        response += f"🚨 State Emergency Numbers:\n"
+        response += f"• {helpline}"
+        return response
+
+    def _render_state_helpline(self, state, helpline):
+        response = self._render_state_numbers(state, helpline)
+        response += f"\n\n📞 Additional Emergency Contacts:\n"
+        response += f"• Police: 100\n"
+        response += f"• Fire: 101\n"
+        response += f"• Ambulance: 102\n"
+        response += f"• National Disaster Management: 108\n"
+        response += f"• NDRF: 011-24363260\n"
+        response += f"• NDMA: 011-26701728\n\n"
+        response += f"💡 Available 24/7 for disaster-related emergencies"
+        return response
+
+    def detect_disaster_type(self, message):
+        disaster = self.detect(message).disaster
+        if disaster:
+            return self.get_disaster_instructions(disaster)
+        return None
+
+    def get_disaster_instructions(self, disaster_type):
+        return self.responses.get(('disaster', None, disaster_type))
+
+    def _render_disaster_instructions(self, instructions):
+        return "\n".join(instructions) + "\n\n" + self._render_emergency_contacts()
+
+    def _render_emergency_contacts(self):
+        response = f"📞 EMERGENCY CONTACTS:\n"
+        response += f"• Police: 100\n"
+        response += f"• Fire: 101\n"
+        response += f"• Ambulance: 102\n"
+        response += f"• Disaster Management: 108\n"
+        response += f"• NDRF: 011-24363260\n"
+        response += f"• NDMA: 011-26701728"
+        return response
+
+    def get_national_helplines(self):
+        return self.responses[('national', None, None)]
+
+    def _render_national_helplines(self):
+        response = "🇮🇳 NATIONAL EMERGENCY HELPLINES:\n\n"
+        for service, number in self.national_helplines.items():
+            response += f"• {service.title()}: {number}\n"
+
+        response += "\n📱 DISASTER MANAGEMENT CONTACTS:\n"
+        response += "• NDRF (National Disaster Response Force): 011-24363260\n"
+        response += "• NDMA (National Disaster Management Authority): 011-26701728\n"
+        response += "• IMD (India Meteorological Department): 011-24629721\n"
+        response += "• State-wise helplines: Varies by state (1070, 1077, 1078, 108, 112)\n\n"
+        response += "These numbers are available 24/7 for emergency assistance."
+        return response
+
+    def get_general_helplines(self):
+        return self.responses[('general', None, None)]
+
+    def _render_general_helplines(self):
+        response = "📞 EMERGENCY HELPLINE NUMBERS:\n\n"
+        response += "🚨 IMMEDIATE EMERGENCY:\n"
+        response += "• Police: 100\n"
+        response += "• Fire: 101\n"
+        response += "• Ambulance: 102\n"
+        response += "• Disaster Management: 108\n\n"
+
+        response += "👥 SPECIALIZED HELPLINES:\n"
+        response += "• Women Helpline: 1091\n"
+        response += "• Child Helpline: 1098\n"
+        response += "• Senior Citizen Helpline: 1090\n\n"
+
+        response += "🏛️ DISASTER MANAGEMENT:\n"
+        response += "• NDRF: 011-24363260\n"
+        response += "• NDMA: 011-26701728\n"
+        response += "• State Disaster Helpline: 1077\n\n"
+
+        response += "For state-specific help, mention your state name."
+        return response
+
+    def get_default_response(self):
+        return self.responses[('default', None, None)]
+
+    def _render_default_response(self):
+        response = "I'm here to help with disaster-related emergencies in India.\n\n"
+        response += "I can assist you with:\n"
+        response += "• State-wise disaster helpline numbers\n"
+        response += "• Safety instructions for different disasters\n"
+        response += "• Emergency contact numbers\n"
+        response += "• Disaster preparedness advice\n\n"
+        response += "📍 **State-Specific Help Available!**\n"
+        response += "Please tell me which state you're in for personalized assistance:\n"
+        response += "• Just type your state name (e.g., 'Maharashtra', 'Kerala', 'Tamil Nadu')\n"
+        response += "• Or mention it in a sentence (e.g., 'I'm in Gujarat and need help')\n\n"
+        response += "Other options:\n"
+        response += "• Type disaster name for safety instructions\n"
+        response += "• 'help [disaster]' or '[disaster] help' (e.g., 'help fire', 'earthquake help')\n"
+        response += "• 'emergency' for immediate help\n"
+        response += "• 'helpline' for contact numbers"
+        return response
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _build_engine(source=None):
+    # DISASTER_CHATBOT_MODEL adds the local intent model as a second tier.
+    knowledge_base = knowledge.load_knowledge_base(source)
+    fallback = build_fallback(knowledge_base) if os.environ.get('DISASTER_CHATBOT_MODEL') else None
+    return DisasterResponseEngine(knowledge_base, fallback=fallback, locator=geo.load_boundaries())
+
+
+def get_engine():
+    # Built once per process on first use and shared by every caller.
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _build_engine()
+    return _engine
+
+
+def reload_engine(source=None):
+    # The replacement is built completely before the swap; requests that
+    # already hold the previous engine finish against it undisturbed.
+    global _engine
+    engine = _build_engine(source)
+    with _engine_lock:
+        _engine = engine
+    return engine
+
+
+class KnowledgeBaseWatcher(threading.Thread):
+    # Polls the knowledge base source and hot-swaps the shared engine when
+    # it changes. A broken edit is logged and the running engine kept.
+
+    def __init__(self, source=None, interval=2.0):
+        super().__init__(name='knowledge-base-watcher', daemon=True)
+        self.source = source or knowledge.source_path()
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.source)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                engine = reload_engine(self.source)
+            except Exception:
+                logger.exception("Knowledge base reload failed; keeping the current engine")
+            else:
+                logger.info("Reloaded knowledge base version %s from %s", engine.version, self.source)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def watch_knowledge_base(source=None, interval=2.0):
+    watcher = KnowledgeBaseWatcher(source, interval)
+    watcher.start()
+    return watcher
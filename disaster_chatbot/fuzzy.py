@@ -0,0 +1,177 @@
+import re
+
+from .matcher import Hit
+
+LONG_WORD_PATTERN = re.compile(r'\w{6,}')
+
+_MISSING = object()
+
+
+def max_distance_for(length):
+    # Short words sit one edit away from too many ordinary words ("blood",
+    # "later", "main"), so they are never corrected.
+    if length < 6:
+        return 0
+    if length < 9:
+        return 1
+    return 2
+
+
+def keeps_edges(word, term):
+    # Below EDGE_LENGTH letters one edit reaches too many ordinary words
+    # ("brought" -> "drought", "turning" -> "burning"), so a correction must
+    # keep the first and last letters. A dropped last letter ("cyclon") and
+    # a plural ("storms") are the exceptions.
+    if word[0] != term[0]:
+        return False
+    return word[-1] == term[-1] or word == term[:-1] or word == term + 's'
+
+
+def _deletes(word, distance):
+    # Every string reachable from word by removing up to `distance` characters.
+    results = {word}
+    frontier = results
+    for _ in range(distance):
+        frontier = {item[:index] + item[index + 1:] for item in frontier for index in range(len(item))}
+        results |= frontier
+    return results
+
+
+def edit_distance(source, target, limit):
+    # Optimal string alignment distance (Levenshtein plus adjacent
+    # transpositions), abandoned as soon as it must exceed `limit`.
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    # Typos rarely touch both ends of a word; trimming the shared prefix
+    # and suffix leaves only a few characters for the quadratic part.
+    prefix = 0
+    shortest = min(len(source), len(target))
+    while prefix < shortest and source[prefix] == target[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < shortest - prefix and
+           source[len(source) - 1 - suffix] == target[len(target) - 1 - suffix]):
+        suffix += 1
+    source = source[prefix:len(source) - suffix]
+    target = target[prefix:len(target) - suffix]
+    if not source or not target:
+        return len(source) + len(target)
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_minimum = i
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2] and
+                    source[i - 2] == target[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_minimum = min(row_minimum, value)
+        if row_minimum > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    # SymSpell-style deletion index. Every vocabulary term is stored under
+    # each string obtained by deleting up to MAX_DISTANCE characters; a query
+    # generates its own deletions and only verifies the handful of terms
+    # that share one, so lookup cost is independent of vocabulary size.
+
+    MAX_DISTANCE = 2
+    MAX_WORDS = 2
+    EDGE_LENGTH = 8
+
+    def __init__(self, entries, common_words=(), memo_size=16384):
+        self._terms = {}
+        # Ordinary words that happen to sit one edit from a term ("sharing",
+        # "waiter", Hinglish "andhera"); they are never corrected.
+        self._common_words = frozenset(common_words)
+        self._index = {}
+        # First letters of each two-word term; typos seldom change the first
+        # letter of a word, so other word pairs are not looked up at all.
+        pair_initials = {}
+        for rank, (term, kind, value) in enumerate(entries):
+            term = ' '.join(term.lower().split())
+            if len(term) < 5 or len(term.split()) > self.MAX_WORDS:
+                continue
+            if term in self._terms:
+                continue
+            self._terms[term] = (rank, kind, value)
+            words = term.split()
+            if len(words) == 2:
+                pair_initials.setdefault(words[0][0], set()).add(words[1][0])
+            for variant in _deletes(term, self.MAX_DISTANCE):
+                self._index.setdefault(variant, []).append(term)
+        # Per-word results. A plain dict is enough: entries are pure, a race
+        # at worst recomputes one, and the whole memo is dropped when full.
+        self._memo = {}
+        self._memo_size = memo_size
+        self._pair_pattern = None
+        if pair_initials:
+            alternatives = '|'.join(
+                re.escape(first) + r'\w*\W+[' + ''.join(sorted(map(re.escape, seconds))) + r']\w*'
+                for first, seconds in sorted(pair_initials.items()))
+            self._pair_pattern = re.compile(r'(?=\b((?:' + alternatives + r')))')
+
+    def __len__(self):
+        return len(self._terms)
+
+    def lookup(self, word):
+        # Returns (term, kind, value, distance) for the closest term, or None.
+        # Ties go to the term listed first in the vocabulary.
+        try:
+            return self._memo[word]
+        except KeyError:
+            pass
+        limit = max_distance_for(len(word))
+        if limit == 0 or word in self._common_words:
+            return None
+        short = len(word) < self.EDGE_LENGTH
+        best = None
+        best_key = None
+        seen = set()
+        for variant in _deletes(word, limit):
+            for term in self._index.get(variant, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                distance = edit_distance(word, term, limit)
+                if distance > limit or (distance and short and not keeps_edges(word, term)):
+                    continue
+                rank, kind, value = self._terms[term]
+                key = (distance, rank)
+                if best_key is None or key < best_key:
+                    best_key = key
+                    best = (term, kind, value, distance)
+        if len(self._memo) >= self._memo_size:
+            self._memo.clear()
+        self._memo[word] = best
+        return best
+
+    def scan(self, text):
+        # Corrects single words and adjacent word pairs ("west bangal").
+        # Both candidate lists come from C-level regex scans, so words that
+        # are too short to correct never reach Python code. Exact
+        # occurrences are left to the main matcher.
+        hits = []
+        memo = self._memo
+        for match in LONG_WORD_PATTERN.finditer(text):
+            word = match.group()
+            found = memo.get(word, _MISSING)
+            if found is _MISSING:
+                found = self.lookup(word)
+            if found is not None and found[3] > 0:
+                hits.append(Hit(found[1], found[2], match.start(), match.end()))
+        if self._pair_pattern is not None:
+            for match in self._pair_pattern.finditer(text):
+                pair = ' '.join(match.group(1).split())
+                found = memo.get(pair, _MISSING)
+                if found is _MISSING:
+                    found = self.lookup(pair)
+                if found is not None and found[3] > 0:
+                    hits.append(Hit(found[1], found[2], match.start(), match.start() + len(match.group(1))))
+        return hits
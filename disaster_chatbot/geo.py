@@ -0,0 +1,154 @@
+import json
+import math
+import os
+from collections import namedtuple
+
+from . import knowledge
+
+Location = namedtuple('Location', ['state', 'district'])
+
+# Property names tried, in order, for a feature's state and district; the
+# usual Indian boundary datasets spell them differently.
+STATE_PROPERTIES = ('state', 'st_nm', 'state_name', 'name')
+DISTRICT_PROPERTIES = ('district', 'dtname', 'district_name', 'dist_name')
+
+CELL_DEGREES = 0.25
+
+
+def boundaries_path():
+    return os.environ.get('DISASTER_CHATBOT_BOUNDARIES',
+                          os.path.join(knowledge.DATA_DIR, 'state_boundaries.geojson'))
+
+
+def _property(properties, names):
+    lowered = {key.lower(): value for key, value in properties.items()}
+    for name in names:
+        value = lowered.get(name)
+        if isinstance(value, str) and value.strip():
+            return ' '.join(value.lower().split())
+    return None
+
+
+def read_boundaries(path):
+    # Yields (Location, polygons) per GeoJSON feature. Each polygon is a
+    # list of rings of (lon, lat) points; holes need no special handling
+    # because the containment test is even-odd over all rings.
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    for feature in data.get('features', ()):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        state = _property(properties, STATE_PROPERTIES)
+        if state is None:
+            continue
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        polygons = [[[(float(point[0]), float(point[1])) for point in ring] for ring in polygon]
+                    for polygon in polygons]
+        yield Location(state, _property(properties, DISTRICT_PROPERTIES)), polygons
+
+
+def _contains(rings, lon, lat):
+    inside = False
+    for ring in rings:
+        x1, y1 = ring[-1]
+        for x2, y2 in ring:
+            if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+            x1, y1 = x2, y2
+    return inside
+
+
+class LocationResolver:
+    # Uniform grid over the boundary polygons. A cell that no boundary edge
+    # crosses belongs wholly to one region and answers with a dict lookup;
+    # only cells on a border keep a short list of polygons to test.
+
+    def __init__(self, regions, cell_degrees=CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.locations = []
+        self._polygons = []
+        self._cells = {}
+        border_cells = {}
+        for location, polygons in regions:
+            for rings in polygons:
+                index = len(self._polygons)
+                self._polygons.append(rings)
+                self.locations.append(location)
+                for cell in self._edge_cells(rings):
+                    candidates = border_cells.setdefault(cell, [])
+                    if not candidates or candidates[-1] != index:
+                        candidates.append(index)
+        for index, rings in enumerate(self._polygons):
+            lons = [lon for ring in rings for lon, _ in ring]
+            lats = [lat for ring in rings for _, lat in ring]
+            for row in range(self._row(min(lats)), self._row(max(lats)) + 1):
+                for column in range(self._column(min(lons)), self._column(max(lons)) + 1):
+                    cell = (row, column)
+                    candidates = border_cells.get(cell)
+                    if cell in self._cells or (candidates and index in candidates):
+                        continue
+                    # None of this polygon's edges cross the cell, so the
+                    # cell is wholly inside or wholly outside it.
+                    centre_lat = (row + 0.5) * cell_degrees
+                    centre_lon = (column + 0.5) * cell_degrees
+                    if not _contains(rings, centre_lon, centre_lat):
+                        continue
+                    if candidates:
+                        # Another region's border (an enclave, say) runs
+                        # through this polygon's interior here.
+                        candidates.append(index)
+                    else:
+                        self._cells[cell] = index
+        for cell, candidates in border_cells.items():
+            self._cells[cell] = tuple(candidates)
+
+    def __len__(self):
+        return len(self._polygons)
+
+    def _row(self, lat):
+        return math.floor(lat / self.cell_degrees)
+
+    def _column(self, lon):
+        return math.floor(lon / self.cell_degrees)
+
+    def _edge_cells(self, rings):
+        # Every cell an edge's bounding box touches; a superset of the cells
+        # it crosses, which only costs a few extra polygon tests.
+        for ring in rings:
+            x1, y1 = ring[-1]
+            for x2, y2 in ring:
+                for row in range(self._row(min(y1, y2)), self._row(max(y1, y2)) + 1):
+                    for column in range(self._column(min(x1, x2)), self._column(max(x1, x2)) + 1):
+                        yield row, column
+                x1, y1 = x2, y2
+
+    def locate(self, lat, lon):
+        # Location(state, district) for a WGS84 coordinate, or None when it
+        # falls outside every boundary.
+        entry = self._cells.get((self._row(lat), self._column(lon)))
+        if entry is None:
+            return None
+        if type(entry) is int:
+            return self.locations[entry]
+        for index in entry:
+            if _contains(self._polygons[index], lon, lat):
+                return self.locations[index]
+        return None
+
+    def locate_many(self, points):
+        locate = self.locate
+        return [locate(lat, lon) for lat, lon in points]
+
+
+def load_boundaries(path=None):
+    # Boundary data is supplied by the deployment; without it, location
+    # lookups are simply unavailable.
+    path = path or boundaries_path()
+    if not os.path.exists(path):
+        return None
+    return LocationResolver(read_boundaries(path))
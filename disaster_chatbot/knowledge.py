@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_SOURCE = os.path.join(DATA_DIR, 'knowledge_base.json')
+
+# Sections holding a single value per key, and sections holding an ordered
+# list per key. Key order matters: the engine uses it to break ties.
+SCALAR_SECTIONS = ('state_helplines', 'national_helplines')
+LIST_SECTIONS = ('disaster_instructions', 'state_variations', 'disaster_help_patterns',
+                 'disaster_keywords', 'intent_keywords')
+# Native-script and romanized names for states, disasters and intents, the
+# urgency scorer's terms by tier, the ordinary words the typo index must
+# leave alone, and plain descriptions of each disaster for the intent model.
+# Optional, so knowledge bases written before they existed still load.
+OPTIONAL_SECTIONS = ('state_translations', 'disaster_translations', 'intent_translations',
+                     'urgency_terms', 'common_words', 'disaster_descriptions')
+
+SCHEMA_VERSION = 5
+MMAP_SIZE = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE entries (
+    section TEXT NOT NULL,
+    key_rank INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    item_rank INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (section, key_rank, item_rank)
+) WITHOUT ROWID;
+CREATE TABLE district_helplines (
+    state TEXT NOT NULL,
+    district TEXT NOT NULL,
+    helpline TEXT NOT NULL,
+    PRIMARY KEY (state, district)
+) WITHOUT ROWID;
+"""
+
+
+def source_path():
+    return os.environ.get('DISASTER_CHATBOT_KB') or DEFAULT_SOURCE
+
+
+def compiled_path(source):
+    return os.path.splitext(source)[0] + '.sqlite'
+
+
+def read_source(source):
+    with open(source, encoding='utf-8') as f:
+        data = json.load(f)
+    missing = [section for section in SCALAR_SECTIONS + LIST_SECTIONS if section not in data]
+    if missing:
+        raise ValueError(f"{source}: missing sections {', '.join(missing)}")
+    return data
+
+
+def compile_knowledge_base(source, target=None):
+    # Writes the SQLite image next to the target and renames it into place,
+    # so readers only ever see a complete file.
+    target = target or compiled_path(source)
+    data = read_source(source)
+    directory = os.path.dirname(os.path.abspath(target))
+    fd, temp_path = tempfile.mkstemp(prefix='.knowledge_base-', suffix='.sqlite', dir=directory)
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.executescript(_SCHEMA)
+            connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('schema_version', str(SCHEMA_VERSION)),
+                ('version', str(data.get('version', 0))),
+                ('source_mtime_ns', str(os.stat(source).st_mtime_ns)),
+            ])
+            rows = []
+            for section in SCALAR_SECTIONS:
+                for key_rank, (key, value) in enumerate(data[section].items()):
+                    rows.append((section, key_rank, key, 0, value))
+            for section in LIST_SECTIONS + OPTIONAL_SECTIONS:
+                for key_rank, (key, values) in enumerate(data.get(section, {}).items()):
+                    for item_rank, value in enumerate(values):
+                        rows.append((section, key_rank, key, item_rank, value))
+            connection.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?)', rows)
+            connection.executemany('INSERT INTO district_helplines VALUES (?, ?, ?)', [
+                (state.lower(), district.lower(), helpline)
+                for state, districts in data.get('district_helplines', {}).items()
+                for district, helpline in districts.items()
+            ])
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return target
+
+
+def _is_stale(source, target):
+    try:
+        connection = sqlite3.connect(f'file:{target}?mode=ro', uri=True)
+    except sqlite3.Error:
+        return True
+    try:
+        meta = dict(connection.execute('SELECT key, value FROM meta'))
+    except sqlite3.Error:
+        return True
+    finally:
+        connection.close()
+    return (meta.get('schema_version') != str(SCHEMA_VERSION) or
+            meta.get('source_mtime_ns') != str(os.stat(source).st_mtime_ns))
+
+
+class KnowledgeBase:
+    # Read-only view over a compiled knowledge base. The small state and
+    # instruction tables are read once; district rows stay in the file, which
+    # SQLite memory-maps so every worker process shares the same pages.
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        connection = self._connection()
+        meta = dict(connection.execute('SELECT key, value FROM meta'))
+        self.version = int(meta['version'])
+
+        sections = {section: {} for section in SCALAR_SECTIONS + LIST_SECTIONS + OPTIONAL_SECTIONS}
+        rows = connection.execute(
+            'SELECT section, key, value FROM entries ORDER BY section, key_rank, item_rank')
+        for section, key, value in rows:
+            if section in SCALAR_SECTIONS:
+                sections[section][key] = value
+            else:
+                sections[section].setdefault(key, []).append(value)
+        self.state_helplines = sections['state_helplines']
+        self.national_helplines = sections['national_helplines']
+        self.disaster_instructions = sections['disaster_instructions']
+        self.state_variations = sections['state_variations']
+        self.disaster_help_patterns = sections['disaster_help_patterns']
+        self.disaster_keywords = sections['disaster_keywords']
+        self.intent_keywords = sections['intent_keywords']
+        self.state_translations = sections['state_translations']
+        self.disaster_translations = sections['disaster_translations']
+        self.intent_translations = sections['intent_translations']
+        self.urgency_terms = sections['urgency_terms']
+        self.common_words = sections['common_words']
+        self.disaster_descriptions = sections['disaster_descriptions']
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True,
+                                         check_same_thread=False)
+            connection.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+            self._local.connection = connection
+        return connection
+
+    def district_helpline(self, state, district):
+        row = self._connection().execute(
+            'SELECT helpline FROM district_helplines WHERE state = ? AND district = ?',
+            (state.lower(), district.lower())).fetchone()
+        return row[0] if row else None
+
+    def district_names(self, state):
+        rows = self._connection().execute(
+            'SELECT district FROM district_helplines WHERE state = ? ORDER BY district',
+            (state.lower(),))
+        return [district for (district,) in rows]
+
+
+def load_knowledge_base(source=None, target=None):
+    source = source or source_path()
+    target = target or compiled_path(source)
+    if _is_stale(source, target):
+        try:
+            compile_knowledge_base(source, target)
+        except OSError:
+            # Read-only install: fall back to a per-user compiled copy.
+            target = os.path.join(tempfile.gettempdir(), 'disaster_chatbot_' + os.path.basename(target))
+            if _is_stale(source, target):
+                compile_knowledge_base(source, target)
+    return KnowledgeBase(target)
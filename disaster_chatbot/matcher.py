@@ -0,0 +1,114 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+Hit = namedtuple('Hit', ['kind', 'value', 'start', 'end'])
+
+_Entry = namedtuple('_Entry', ['length', 'kind', 'value', 'bounded'])
+
+
+def _is_word_char(char):
+    # Combining marks (Indic vowel signs, viramas) are part of the word they
+    # follow: "आगे" must not count as a whole-word "आग".
+    return char.isalnum() or char == '_' or unicodedata.category(char)[0] == 'M'
+
+
+def _trie_pattern(node):
+    # Alternatives under a node all start with a different character, so the
+    # regex engine follows at most one branch per character, and the greedy
+    # optional group makes it report the longest phrase at each position.
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        return '(?:' + body + ')?'
+    return body
+
+
+class PhraseMatcher:
+    # One precompiled automaton over every phrase the engine cares about:
+    # a single left-to-right pass reports every (possibly overlapping)
+    # occurrence, so the cost per message depends on the message length,
+    # not on how many states and keywords are in the vocabulary.
+
+    def __init__(self, entries):
+        phrases = {}
+        for entry in entries:
+            phrase, kind, value = entry[:3]
+            bounded = entry[3] if len(entry) > 3 else False
+            phrase = phrase.lower()
+            if not phrase:
+                continue
+            record = _Entry(len(phrase), kind, value, bounded)
+            if record not in phrases.setdefault(phrase, []):
+                phrases[phrase].append(record)
+
+        # Phrases starting with a non-ASCII letter get their own automaton.
+        # Mixing them in would stop the regex engine from skipping ahead by
+        # first character, tripling the cost of every plain English message,
+        # and an ASCII message can never contain them anyway.
+        tries = ({}, {})
+        for phrase in phrases:
+            node = tries[not phrase[0].isascii()]
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        # The automaton reports only the longest phrase at each start
+        # position; every shorter phrase sharing that start is a prefix of it
+        # and is resolved here once instead of per message.
+        self._entries = {}
+        for phrase in phrases:
+            self._entries[phrase] = tuple(
+                record
+                for length in range(1, len(phrase) + 1)
+                for record in phrases.get(phrase[:length], ())
+            )
+
+        self.vocabulary_size = len(phrases)
+        self._pattern, self._native_pattern = (
+            re.compile('(?=(' + _trie_pattern(trie) + '))') if trie else None for trie in tries)
+
+    def export(self):
+        # Plain data for from_export(): the automata's regex source and the
+        # prefix-closed entry table, so loading rebuilds neither the tries
+        # nor the closure.
+        return {
+            'patterns': [pattern.pattern if pattern is not None else None
+                         for pattern in (self._pattern, self._native_pattern)],
+            'entries': {phrase: [list(record) for record in records]
+                        for phrase, records in self._entries.items()},
+        }
+
+    @classmethod
+    def from_export(cls, data):
+        matcher = cls.__new__(cls)
+        matcher._entries = {phrase: tuple(_Entry(*record) for record in records)
+                            for phrase, records in data['entries'].items()}
+        matcher.vocabulary_size = len(matcher._entries)
+        matcher._pattern, matcher._native_pattern = (
+            re.compile(source) if source else None for source in data['patterns'])
+        return matcher
+
+    def scan(self, text):
+        hits = []
+        if self._pattern is not None:
+            self._scan(self._pattern, text, hits)
+        # str.isascii() is constant time, so English traffic pays nothing.
+        if self._native_pattern is not None and not text.isascii():
+            self._scan(self._native_pattern, text, hits)
+            hits.sort(key=lambda hit: hit.start)
+        return hits
+
+    def _scan(self, pattern, text, hits):
+        text_length = len(text)
+        for match in pattern.finditer(text):
+            start = match.start()
+            for length, kind, value, bounded in self._entries[match.group(1)]:
+                end = start + length
+                if bounded and ((start and _is_word_char(text[start - 1])) or
+                                (end < text_length and _is_word_char(text[end]))):
+                    continue
+                hits.append(Hit(kind, value, start, end))
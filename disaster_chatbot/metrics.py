@@ -0,0 +1,166 @@
+import os
+import threading
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds in seconds; the engine answers in microseconds, so the
+# buckets are dense at the low end.
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0)
+
+# The process-wide recorder. None means instrumentation is off, which costs
+# the engine a single attribute check per message.
+recorder = None
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRecorder:
+    # Per-stage counters and latency histograms for the intent cascade.
+    # Stages are the branches of DisasterResponseEngine.route() ('emergency',
+    # 'state', 'disaster', ..., 'default'); phases are the timed steps of a
+    # request ('cache_lookup', 'detect', 'route').
+
+    def __init__(self, unmatched_sample=100):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.cache_answers = {}
+        self.stage_latency = {}
+        self.phase_latency = {}
+        self.unmatched = deque(maxlen=unmatched_sample)
+
+    def observe_phase(self, phase, seconds):
+        with self._lock:
+            histogram = self.phase_latency.get(phase)
+            if histogram is None:
+                histogram = self.phase_latency[phase] = Histogram()
+            histogram.observe(seconds)
+
+    def record_request(self, stage, cached, seconds, message=None):
+        with self._lock:
+            self.requests[stage] = self.requests.get(stage, 0) + 1
+            if cached:
+                self.cache_answers[stage] = self.cache_answers.get(stage, 0) + 1
+            histogram = self.stage_latency.get(stage)
+            if histogram is None:
+                histogram = self.stage_latency[stage] = Histogram()
+            histogram.observe(seconds)
+            if message is not None:
+                self.unmatched.append(message)
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(self.requests.values())
+            return {
+                'requests': dict(self.requests),
+                'cache_answers': dict(self.cache_answers),
+                'total': total,
+                'default_rate': self.requests.get('default', 0) / total if total else 0.0,
+                'recent_unmatched': list(self.unmatched),
+            }
+
+    def render_prometheus(self, cache_stats=None):
+        lines = []
+        with self._lock:
+            total = sum(self.requests.values())
+            lines.append('# HELP chatbot_requests_total Messages answered, by cascade stage.')
+            lines.append('# TYPE chatbot_requests_total counter')
+            for stage, count in sorted(self.requests.items()):
+                lines.append(f'chatbot_requests_total{{stage="{stage}"}} {count}')
+            lines.append('# HELP chatbot_cache_answers_total Messages answered from the response cache, by stage.')
+            lines.append('# TYPE chatbot_cache_answers_total counter')
+            for stage, count in sorted(self.cache_answers.items()):
+                lines.append(f'chatbot_cache_answers_total{{stage="{stage}"}} {count}')
+            lines.append('# HELP chatbot_default_ratio Share of messages that fell through to the default reply.')
+            lines.append('# TYPE chatbot_default_ratio gauge')
+            lines.append(f'chatbot_default_ratio {self.requests.get("default", 0) / total if total else 0.0}')
+            _render_histograms(lines, 'chatbot_stage_latency_seconds',
+                               'End-to-end latency, by answering stage.', 'stage', self.stage_latency)
+            _render_histograms(lines, 'chatbot_phase_latency_seconds',
+                               'Latency of each processing phase.', 'phase', self.phase_latency)
+        if cache_stats is not None:
+            lines.append('# HELP chatbot_cache_lookups_total Response cache lookups, by result.')
+            lines.append('# TYPE chatbot_cache_lookups_total counter')
+            lines.append(f'chatbot_cache_lookups_total{{result="hit"}} {cache_stats["hits"]}')
+            lines.append(f'chatbot_cache_lookups_total{{result="miss"}} {cache_stats["misses"]}')
+            lines.append('# HELP chatbot_cache_entries Entries held in the response cache.')
+            lines.append('# TYPE chatbot_cache_entries gauge')
+            lines.append(f'chatbot_cache_entries {cache_stats["size"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histograms(lines, name, help_text, label, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), histogram.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.total}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+
+
+def enable(unmatched_sample=100):
+    global recorder
+    if recorder is None:
+        recorder = MetricsRecorder(unmatched_sample)
+    return recorder
+
+
+def disable():
+    global recorder
+    recorder = None
+
+
+def render():
+    # Prometheus text for the current recorder and the shared engine's cache.
+    if recorder is None:
+        return None
+    from .engine import get_engine
+    return recorder.render_prometheus(get_engine().response_cache.stats())
+
+
+def serve_metrics(host='127.0.0.1', port=9108):
+    # Standalone /metrics endpoint for processes without the chat server,
+    # such as the desktop client or a batch job. http.server is imported
+    # here rather than at the top so that importing the package stays cheap.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render() if self.path == '/metrics' else None
+            if body is None:
+                self.send_error(404)
+                return
+            payload = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+if os.environ.get('DISASTER_CHATBOT_METRICS'):
+    enable()
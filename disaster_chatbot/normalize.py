@@ -0,0 +1,16 @@
+import unicodedata
+
+# Invisible characters that keyboards and messaging apps scatter through
+# Indic text (zero-width joiner/non-joiner, zero-width space, soft hyphen,
+# byte order mark). They change rendering, never meaning.
+_INVISIBLE = dict.fromkeys(map(ord, '​‌‍⁠﻿­'))
+
+
+def normalize(text):
+    # Canonical form used on both sides of matching: NFKC folds presentation
+    # variants (full-width Latin, precomposed nukta letters) onto one
+    # spelling and casefold() lower-cases every script. Plain ASCII, the
+    # bulk of traffic, is already in that form apart from its case.
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize('NFKC', text).casefold().translate(_INVISIBLE)
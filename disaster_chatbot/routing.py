@@ -0,0 +1,80 @@
+from collections import namedtuple
+
+# The rules that turn matcher hits into a reply key. They only need the
+# hits and the table ranks, so the engine and the offline bundle share them
+# without the bundle importing the engine.
+
+Detection = namedtuple('Detection', ['intents', 'state', 'disaster', 'hits', 'case_sensitive'])
+
+STATE_INQUIRY_MESSAGES = ('state inquiry', 'state help')
+
+
+def read_hits(message, message_lower, hits, state_rank, disaster_rank):
+    # (intents, state, disaster, case_sensitive) from the exact matcher's
+    # hits. Table order decides which state or disaster wins when a message
+    # mentions several of them.
+    intents = set()
+    state = help_disaster = disaster = None
+    case_sensitive = False
+    for hit in hits:
+        kind, value = hit.kind, hit.value
+        if kind == 'intent':
+            intents.add(value)
+        elif kind == 'state' or kind == 'state_abbreviation':
+            if kind == 'state_abbreviation':
+                case_sensitive = True
+                if not is_abbreviation(message, message_lower, hit):
+                    continue
+            if state is None or state_rank[value] < state_rank[state]:
+                state = value
+        elif kind == 'disaster_help':
+            if help_disaster is None or disaster_rank[value] < disaster_rank[help_disaster]:
+                help_disaster = value
+        elif kind == 'disaster':
+            if disaster is None or disaster_rank[value] < disaster_rank[disaster]:
+                disaster = value
+    # An explicit "help <disaster>" request outranks a passing mention.
+    return intents, state, help_disaster or disaster, case_sensitive
+
+
+def is_abbreviation(message, message_lower, hit):
+    # A two-letter code counts when it is the whole message, or when that
+    # very word is in capitals in a message that is not all capitals:
+    # "UPDATE ... coming up" and "WATER COMING UP" are not Uttar Pradesh.
+    abbreviation = message_lower[hit.start:hit.end]
+    if message_lower.strip() == abbreviation:
+        return True
+    # Hit positions index message_lower; they only line up with the
+    # original when normalization kept its length.
+    if len(message) != len(message_lower) or message.isupper():
+        return False
+    return message[hit.start:hit.end].isupper()
+
+
+def route(message_lower, detection):
+    intents = detection.intents
+
+    # Everything the scan found is answered together: an emergency
+    # reply also carries the state and disaster it mentioned.
+    if 'emergency' in intents:
+        return ('emergency', detection.state, detection.disaster)
+
+    if detection.state:
+        return ('state', detection.state, detection.disaster)
+
+    if detection.disaster:
+        return ('disaster', None, detection.disaster)
+
+    if 'national' in intents:
+        return ('national', None, None)
+
+    if 'helpline' in intents:
+        return ('general', None, None)
+
+    if message_lower in STATE_INQUIRY_MESSAGES:
+        return ('state_inquiry', None, None)
+
+    if 'help' in intents:
+        return ('state_inquiry', None, None)
+
+    return ('default', None, None)
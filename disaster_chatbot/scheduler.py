@@ -0,0 +1,102 @@
+import asyncio
+import time
+from collections import deque
+
+from . import metrics
+from .urgency import LEVELS
+
+
+class Overloaded(Exception):
+    pass
+
+
+class PriorityScheduler:
+    # Admits work to the engine's thread pool most urgent first. At most
+    # `max_running` jobs are in the pool; the rest wait in one FIFO queue per
+    # priority, and a freed slot always goes to the most urgent waiter.
+    # Queues are bounded: together they hold at most `max_queued` waiters,
+    # and each lower priority only a shrinking share of that, so low-priority
+    # traffic is turned away long before it can crowd out "trapped" or
+    # "drowning". When the queues are full, an urgent arrival evicts the
+    # newest waiter of a lower priority rather than being refused.
+    # Runs entirely on the event loop, so it needs no locks.
+
+    def __init__(self, executor, max_running, max_queued=1024, shares=(1.0, 0.5, 0.25)):
+        self._executor = executor
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self._limits = [max(1, int(max_queued * share)) for share in shares]
+        self._queues = [deque() for _ in shares]
+        self._queued = 0
+        self._running = 0
+        self.shed = [0] * len(shares)
+
+    async def run(self, priority, function, *args):
+        # Raises Overloaded when the request was refused or evicted.
+        started = time.perf_counter()
+        if self._running < self.max_running and not self._queued:
+            self._running += 1
+        else:
+            await self._wait_turn(priority)
+        recorder = metrics.recorder
+        if recorder is not None:
+            recorder.observe_phase('queue_' + LEVELS[priority], time.perf_counter() - started)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, function, *args)
+        finally:
+            self._running -= 1
+            self._wake_next()
+
+    async def _wait_turn(self, priority):
+        queue = self._queues[priority]
+        if len(queue) >= self._limits[priority] or (
+                self._queued >= self.max_queued and not self._evict_below(priority)):
+            self.shed[priority] += 1
+            raise Overloaded()
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self._queued += 1
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # Cancelled just after being handed a slot: pass it on.
+                self._running -= 1
+                self._wake_next()
+            elif waiter in queue:
+                queue.remove(waiter)
+                self._queued -= 1
+            raise
+
+    def _evict_below(self, priority):
+        for lower in range(len(self._queues) - 1, priority, -1):
+            queue = self._queues[lower]
+            if queue:
+                victim = queue.pop()
+                self._queued -= 1
+                self.shed[lower] += 1
+                victim.set_exception(Overloaded())
+                return True
+        return False
+
+    def _wake_next(self):
+        # The slot is reserved here, on behalf of the waiter, so a request
+        # arriving before the waiter resumes cannot take it.
+        while self._running < self.max_running and self._queued:
+            for queue in self._queues:
+                if queue:
+                    waiter = queue.popleft()
+                    self._queued -= 1
+                    # A cancelled waiter is skipped; its slot goes on.
+                    if not waiter.done():
+                        self._running += 1
+                        waiter.set_result(None)
+                    break
+
+    def stats(self):
+        return {
+            'running': self._running,
+            'queued': {level: len(queue) for level, queue in zip(LEVELS, self._queues)},
+            'shed': dict(zip(LEVELS, self.shed)),
+        }
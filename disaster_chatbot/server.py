@@ -0,0 +1,507 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import struct
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from . import metrics
+from .engine import get_engine, watch_knowledge_base
+from .scheduler import Overloaded, PriorityScheduler
+from .sessions import SessionStore
+from .urgency import LEVELS
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+MAX_MESSAGE_CHARS = 4096
+MAX_LOCATE_POINTS = 1000
+MAX_SESSION_ID_CHARS = 128
+SNAPSHOT_INTERVAL = 60.0
+
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'version', 'headers', 'body')
+
+    def __init__(self, method, target, version, headers, body=b''):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.query = parse_qs(url.query)
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return 'keep-alive' in connection
+        return 'close' not in connection
+
+
+class ChatServer:
+    # asyncio front end for the shared engine. Each connection handles its
+    # requests strictly in order, so pipelined HTTP/1.1 requests are
+    # answered in the order they arrived. Engine work runs on a bounded
+    # thread pool behind a PriorityScheduler: messages are scored for
+    # urgency on arrival, the most urgent are dequeued first, and under
+    # overload low-priority requests are refused with 503 instead of
+    # delaying life-critical ones.
+
+    def __init__(self, host='0.0.0.0', port=8080, max_workers=8, max_pending=1024,
+                 max_connections=50000, idle_timeout=120.0, sessions=None):
+        self.host = host
+        self.port = port
+        # Optional SessionStore. HTTP clients name their session in an
+        # X-Session-Id header; a WebSocket connection is one session.
+        self.sessions = sessions
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='chatbot-worker')
+        self.scheduler = PriorityScheduler(self._executor, max_workers, max_pending)
+        self._connections = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port,
+            limit=MAX_HEADER_BYTES, backlog=4096)
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        addresses = ', '.join(str(sock.getsockname()) for sock in self._server.sockets)
+        logger.info("Serving chatbot on %s", addresses)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def reply(self, message, location=None, session=None):
+        engine = get_engine()
+        # Repeated queries are answered straight from the response cache
+        # without a round trip through the worker pool.
+        cached = engine.cached_response(message, location, session)
+        if cached is not None:
+            return cached
+        return await self._schedule(engine.priority(message), engine.process_message, message,
+                                    location, session)
+
+    async def _schedule(self, priority, function, *args):
+        try:
+            return await self.scheduler.run(priority, function, *args)
+        except Overloaded:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "server busy")
+
+    def session(self, session_id):
+        if self.sessions is None or not session_id:
+            return None
+        if len(session_id) > MAX_SESSION_ID_CHARS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "session id is too long")
+        return self.sessions.get(session_id)
+
+    async def locate(self, points):
+        engine = get_engine()
+        if engine.locator is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "no boundary data is installed")
+        # Ranked with ordinary traffic: below messages that sound urgent.
+        return await self._schedule(LEVELS.index('medium'), _describe_places, engine, points)
+
+    async def _handle_connection(self, reader, writer):
+        if self._connections >= self.max_connections:
+            writer.write(_http_response(HTTPStatus.SERVICE_UNAVAILABLE,
+                                        _json_body({'error': 'server busy'}), keep_alive=False))
+            await _close(writer)
+            return
+        self._connections += 1
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as error:
+                    writer.write(_http_response(error.status, _json_body({'error': str(error)}),
+                                                keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                if request.headers.get('upgrade', '').lower() == 'websocket':
+                    if request.path == '/ws':
+                        await self._handle_websocket(request, reader, writer)
+                    else:
+                        writer.write(_http_response(HTTPStatus.NOT_FOUND, b'', keep_alive=False))
+                        await writer.drain()
+                    break
+
+                status, body, content_type = await self._dispatch(request)
+                writer.write(_http_response(status, body, request.keep_alive, content_type))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections -= 1
+            await _close(writer)
+
+    async def _dispatch(self, request):
+        try:
+            if request.method == 'OPTIONS':
+                return HTTPStatus.NO_CONTENT, b'', None
+            if request.path == '/health' and request.method == 'GET':
+                engine = get_engine()
+                return HTTPStatus.OK, _json_body({
+                    'status': 'ok',
+                    'knowledge_base_version': engine.version,
+                    'connections': self._connections,
+                    'cache': engine.response_cache.stats(),
+                    'scheduler': self.scheduler.stats(),
+                }), None
+            if request.path == '/metrics' and request.method == 'GET':
+                body = metrics.render()
+                if body is None:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, "metrics are disabled")
+                return HTTPStatus.OK, body.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+            if request.path == '/chat':
+                message, location = _chat_message(request)
+                session = self.session(request.headers.get('x-session-id'))
+                response = await self.reply(message, location, session)
+                return HTTPStatus.OK, _json_body({'response': response}), None
+            if request.path == '/locate':
+                points, single = _locate_points(request)
+                locations = await self.locate(points)
+                body = {'location': locations[0]} if single else {'locations': locations}
+                return HTTPStatus.OK, _json_body(body), None
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        except HTTPError as error:
+            return error.status, _json_body({'error': str(error)}), None
+
+    async def _handle_websocket(self, request, reader, writer):
+        key = request.headers.get('sec-websocket-key')
+        if not key or request.headers.get('sec-websocket-version') != '13':
+            writer.write(_http_response(HTTPStatus.BAD_REQUEST, b'', keep_alive=False))
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WEBSOCKET_GUID).digest()).decode()
+        writer.write(
+            b'HTTP/1.1 101 Switching Protocols\r\n'
+            b'Upgrade: websocket\r\n'
+            b'Connection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept.encode() + b'\r\n\r\n')
+        await writer.drain()
+
+        # A client that names its session may come back on a new connection;
+        # a generated one dies with this connection, so it is dropped at once
+        # rather than left for the TTL.
+        session_id = (request.headers.get('x-session-id') or
+                      request.query.get('session', [None])[0])
+        generated = session_id is None
+        if generated:
+            session_id = uuid.uuid4().hex
+        try:
+            while True:
+                try:
+                    opcode, payload = await asyncio.wait_for(_read_ws_message(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except HTTPError:
+                    writer.write(_ws_frame(OP_CLOSE, struct.pack('!H', 1009)))
+                    await writer.drain()
+                    return
+
+                if opcode == OP_CLOSE:
+                    writer.write(_ws_frame(OP_CLOSE, payload[:2]))
+                    await writer.drain()
+                    return
+                if opcode == OP_PING:
+                    writer.write(_ws_frame(OP_PONG, payload))
+                elif opcode in (OP_TEXT, OP_BINARY):
+                    try:
+                        message, location = _ws_chat_message(payload)
+                        session = self.session(session_id)
+                        reply = {'response': await self.reply(message, location, session)}
+                    except HTTPError as error:
+                        reply = {'error': str(error)}
+                    writer.write(_ws_frame(OP_TEXT, _json_body(reply)))
+                await writer.drain()
+        finally:
+            if generated and self.sessions is not None:
+                self.sessions.discard(session_id)
+
+
+async def _read_request(reader):
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as error:
+        if not error.partial.strip():
+            return None
+        raise
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        headers[name.strip().lower()] = value.strip()
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED)
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    body = await reader.readexactly(length) if length else b''
+    return Request(method.upper(), target, version, headers, body)
+
+
+def _chat_message(request):
+    # Returns (message, location); location is a (lat, lon) pair when the
+    # client sent coordinates, else None.
+    if request.method == 'GET':
+        message = request.query.get('message', [''])[0]
+        location = _location(request.query.get('lat', [None])[0], request.query.get('lon', [None])[0])
+    elif request.method == 'POST':
+        content_type = request.headers.get('content-type', '')
+        if content_type.startswith('application/json'):
+            payload = _json_object(request.body, "body must be a JSON object")
+            message = payload.get('message', '')
+            location = _location(payload.get('lat'), payload.get('lon'))
+        else:
+            message = request.body.decode('utf-8', errors='replace')
+            location = None
+    else:
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+    return _validate_message(message), location
+
+
+def _ws_chat_message(payload):
+    text = payload.decode('utf-8', errors='replace')
+    location = None
+    if text.startswith('{'):
+        frame = _json_object(text, "frame must be text or a JSON object")
+        text = frame.get('message', '')
+        location = _location(frame.get('lat'), frame.get('lon'))
+    return _validate_message(text), location
+
+
+def _json_object(text, error):
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, error)
+    if not isinstance(payload, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, error)
+    return payload
+
+
+def _location(lat, lon):
+    if lat is None and lon is None:
+        return None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "lat and lon must be numbers")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "lat and lon are out of range")
+    return lat, lon
+
+
+def _describe_places(engine, points):
+    described = []
+    for place in engine.locate_many(points):
+        if place is None:
+            described.append(None)
+            continue
+        described.append({
+            'state': place.state,
+            'district': place.district,
+            'helpline': engine.state_helplines.get(place.state),
+            'district_helpline': place.district and engine.get_district_helpline(place.state, place.district),
+        })
+    return described
+
+
+def _locate_points(request):
+    # GET /locate?lat=..&lon=.. for one point; POST {"points": [[lat, lon], ...]}
+    # for a batch. Returns (points, single).
+    if request.method == 'GET':
+        location = _location(request.query.get('lat', [None])[0], request.query.get('lon', [None])[0])
+        if location is None:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "lat and lon are required")
+        return [location], True
+    if request.method != 'POST':
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+    points = _json_object(request.body, "body must be a JSON object").get('points')
+    if not isinstance(points, list) or not points:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "points must be a list of [lat, lon] pairs")
+    if len(points) > MAX_LOCATE_POINTS:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "too many points")
+    located = []
+    for point in points:
+        if not isinstance(point, (list, tuple)) or len(point) != 2:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "points must be a list of [lat, lon] pairs")
+        located.append(_location(*point))
+    return located, False
+
+
+def _validate_message(message):
+    if not isinstance(message, str) or not message.strip():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "message is required")
+    if len(message) > MAX_MESSAGE_CHARS:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "message is too long")
+    return message.strip()
+
+
+async def _read_ws_message(reader):
+    # Reassembles fragmented data frames; control frames may interleave.
+    fragments = []
+    message_opcode = None
+    size = 0
+    while True:
+        first, second = await reader.readexactly(2)
+        fin = first & 0x80
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('!H', await reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', await reader.readexactly(8))
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask and length:
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+
+        if opcode >= OP_CLOSE:
+            return opcode, payload
+        if opcode != OP_CONTINUATION:
+            message_opcode = opcode
+            fragments = []
+            size = 0
+        fragments.append(payload)
+        size += length
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        if fin:
+            return message_opcode, b''.join(fragments)
+
+
+def _ws_frame(opcode, payload):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _json_body(payload):
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def _http_response(status, body, keep_alive=True, content_type=None):
+    headers = [
+        f'HTTP/1.1 {status.value} {status.phrase}',
+        f'Content-Length: {len(body)}',
+        'Access-Control-Allow-Origin: *',
+        'Access-Control-Allow-Methods: GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers: Content-Type, X-Session-Id',
+        'Connection: ' + ('keep-alive' if keep_alive else 'close'),
+    ]
+    if body:
+        headers.append('Content-Type: ' + (content_type or 'application/json; charset=utf-8'))
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def _close(writer):
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+async def _snapshot_sessions(sessions, path, interval=SNAPSHOT_INTERVAL):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(None, sessions.save, path)
+        except OSError:
+            logger.exception("Could not write session snapshot %s", path)
+
+
+async def _serve_with_snapshots(server, sessions, path):
+    snapshots = asyncio.ensure_future(_snapshot_sessions(sessions, path))
+    try:
+        await server.serve_forever()
+    finally:
+        snapshots.cancel()
+
+
+def serve(host='0.0.0.0', port=8080, max_workers=8, max_pending=1024, max_connections=50000,
+          enable_metrics=False, max_sessions=500000, session_ttl=1800.0, session_snapshot=None):
+    if enable_metrics:
+        metrics.enable()
+    sessions = SessionStore(max_sessions, session_ttl) if max_sessions else None
+    if sessions is not None and session_snapshot and os.path.exists(session_snapshot):
+        try:
+            logger.info("Restored %d sessions from %s", sessions.load(session_snapshot), session_snapshot)
+        except (OSError, ValueError):
+            logger.exception("Ignoring unreadable session snapshot %s", session_snapshot)
+    server = ChatServer(host, port, max_workers=max_workers, max_pending=max_pending,
+                        max_connections=max_connections, sessions=sessions)
+    # Build the engine before accepting connections so the first request
+    # does not pay for it.
+    get_engine()
+    watch_knowledge_base()
+    try:
+        if sessions is not None and session_snapshot:
+            asyncio.run(_serve_with_snapshots(server, sessions, session_snapshot))
+        else:
+            asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sessions is not None and session_snapshot:
+            logger.info("Saved %d sessions to %s", sessions.save(session_snapshot), session_snapshot)
@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+SNAPSHOT_VERSION = 1
+
+
+class Session:
+    # What the conversation has established so far. State and disaster
+    # names are the engine's own interned strings, so a record costs a few
+    # dozen bytes however many sessions mention the same state.
+    # Requests for one session can run on several workers at once, so reads
+    # and updates go through a lock: the store's shard lock for sessions it
+    # holds, rather than one lock per session.
+    __slots__ = ('state', 'disaster', 'turns', 'expires', '_lock')
+
+    def __init__(self, state=None, disaster=None, turns=0, expires=0.0, lock=None):
+        self.state = state
+        self.disaster = disaster
+        self.turns = turns
+        self.expires = expires
+        self._lock = lock or threading.Lock()
+
+    def context(self):
+        with self._lock:
+            return self.state, self.disaster
+
+    def record(self, state, disaster):
+        with self._lock:
+            if state:
+                self.state = state
+            if disaster:
+                self.disaster = disaster
+            self.turns += 1
+
+
+class SessionStore:
+    # Sessions expire `ttl` seconds after their last message and the least
+    # recently used ones are dropped beyond `max_sessions`. Ids are spread
+    # over independently locked shards so that server workers rarely wait
+    # on each other; each shard is ordered by last use, so expired sessions
+    # always sit at its front and are swept off as new ones arrive.
+
+    def __init__(self, max_sessions=500000, ttl=1800.0, shards=64):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # Every shard holds at least one session, so there can be no more
+        # shards than sessions or the limit would not hold.
+        shards = max(1, min(shards, max_sessions))
+        self._shard_capacity = max(1, max_sessions // shards)
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def _shard(self, session_id):
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def get(self, session_id, create=True):
+        # The live session for session_id, refreshed; a new one if it is
+        # unknown or expired and create is set, else None.
+        lock, sessions = self._shard(session_id)
+        now = time.monotonic()
+        with lock:
+            session = sessions.get(session_id)
+            if session is not None and session.expires > now:
+                sessions.move_to_end(session_id)
+                session.expires = now + self.ttl
+                return session
+            if session is not None:
+                del sessions[session_id]
+            if not create:
+                return None
+            session = sessions[session_id] = Session(expires=now + self.ttl, lock=lock)
+            self._evict(sessions, now)
+            return session
+
+    def _evict(self, sessions, now):
+        while sessions:
+            oldest = next(iter(sessions.values()))
+            if oldest.expires > now and len(sessions) <= self._shard_capacity:
+                break
+            sessions.popitem(last=False)
+
+    def discard(self, session_id):
+        lock, sessions = self._shard(session_id)
+        with lock:
+            sessions.pop(session_id, None)
+
+    def __len__(self):
+        return sum(len(sessions) for _, sessions in self._shards)
+
+    def save(self, path):
+        # Written to a temporary file and renamed into place, so a crash
+        # mid-write leaves the previous snapshot intact. Expiry times are
+        # stored as wall-clock time, since monotonic time does not survive
+        # a restart.
+        offset = time.time() - time.monotonic()
+        now = time.monotonic()
+        records = []
+        for lock, sessions in self._shards:
+            with lock:
+                records.extend([session_id, session.state, session.disaster, session.turns,
+                                session.expires + offset]
+                               for session_id, session in sessions.items() if session.expires > now)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix='.sessions-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': SNAPSHOT_VERSION, 'sessions': records}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return len(records)
+
+    def load(self, path):
+        # Restores a snapshot written by save(), skipping sessions that have
+        # expired since.
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: unsupported session snapshot version {data.get('version')}")
+        offset = time.time() - time.monotonic()
+        now = time.monotonic()
+        restored = 0
+        # Oldest first, so each shard ends up ordered by last use again.
+        for session_id, state, disaster, turns, expires_at in sorted(
+                data['sessions'], key=lambda record: record[4]):
+            expires = expires_at - offset
+            if expires <= now:
+                continue
+            # Interned so that restored sessions share one copy of each name.
+            state = sys.intern(state) if state else None
+            disaster = sys.intern(disaster) if disaster else None
+            lock, sessions = self._shard(session_id)
+            with lock:
+                sessions[session_id] = Session(state, disaster, turns, expires, lock)
+                sessions.move_to_end(session_id)
+                self._evict(sessions, now)
+            restored += 1
+        return restored